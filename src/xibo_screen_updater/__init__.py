@@ -8,15 +8,30 @@ uploading new files to Xibo CMS displays.
 __version__ = "2.0.0"
 __author__ = "XiboScreenUpdater Team"
 
-from .core.application import XiboScreenUpdater
-from .core.config_manager import ConfigManager, ConfigurationError
-from .providers.nextcloud import NextCloudClient
-from .providers.xibo import XiboClient
-
-__all__ = [
-    "XiboScreenUpdater",
-    "ConfigManager", 
-    "ConfigurationError",
-    "NextCloudClient",
-    "XiboClient",
-]
+import importlib
+
+# Exported names and the modules defining them. They are imported on first
+# access, so importing a single submodule doesn't load requests and both
+# providers.
+_EXPORTS = {
+    "XiboScreenUpdater": ".core.application",
+    "ConfigManager": ".core.config_manager",
+    "ConfigurationError": ".core.config_manager",
+    "NextCloudClient": ".providers.nextcloud",
+    "XiboClient": ".providers.xibo",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
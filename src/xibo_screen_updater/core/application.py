@@ -7,14 +7,39 @@ the monitoring, processing, and uploading workflow.
 
 import sys
 import argparse
-from datetime import datetime
-from time import sleep
+import logging
+import queue
+import shutil
+import signal
+import tempfile
+import threading
+from collections import OrderedDict, deque
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import BinaryIO, Dict, List, Optional, Tuple
 
 from .config_manager import ConfigManager, ConfigurationError, resolve_config_path
 from .file_processor import ProcessingStats
+from .seen_files import FileVersion, SeenFileCache, default_seen_files_path
 from .logging_config import setup_logging, get_component_logger, LogContext
+from .retry import with_retries
 from ..providers.xibo import create_xibo_provider
 from ..providers.nextcloud import create_nextcloud_provider
+from ..types.file_info import FileInfo
+
+# Prefetched downloads stay in memory up to this size, then spill to disk
+PREFETCH_SPOOL_SIZE = 8 * 1024 * 1024
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# Upper bound for the poll interval after repeated failed cycles
+MAX_BACKOFF_INTERVAL = 300
+
+# Media IDs remembered per file etag, to show renamed files without uploading them again
+MEDIA_CACHE_SIZE = 1000
+
+# How long shutdown waits for queued uploads to finish
+UPLOAD_SHUTDOWN_TIMEOUT = 60
 
 
 class XiboScreenUpdater:
@@ -30,11 +55,37 @@ class XiboScreenUpdater:
         self.config_path = config_path
         self.config_manager = ConfigManager()
         self.logger = setup_logging()
-        self.latest_upload_date = datetime.utcnow()
+        # Unix timestamp of the newest upload already handled, restored from
+        # the seen files database by initialize
+        self.latest_upload_ts = int(time.time())
+        self.seen_files = SeenFileCache(path=default_seen_files_path())
+        self._stop = threading.Event()
+        self._consecutive_errors = 0
+        self._last_activity_id = None
+        # Unprocessed files seen in the last listing, waiting for their version to settle
+        self._settling: Dict[str, FileVersion] = {}
+        # Newest upload time listed so far, where the cursor goes once nothing holds it back
+        self._latest_listed_ts = 0
         
-        # Providers will be initialized during setup
+        # Uploads run on a single background thread, in the order they were queued.
+        # Results come back through a second queue so that only the monitoring
+        # thread touches the seen files database.
+        self._upload_queue: "queue.Queue[Optional[FileInfo]]" = queue.Queue()
+        self._upload_results: "queue.Queue[Tuple[FileInfo, bool]]" = queue.Queue()
+        self._uploader: Optional[threading.Thread] = None
+        # Upload time of each file queued but not yet recorded, holding back the cursor
+        self._in_flight: Dict[str, int] = {}
+        # Least recently used first; only touched by the uploader thread
+        self._media_ids: "OrderedDict[str, str]" = OrderedDict()
+        # Uploaded file whose display update was left to a file queued behind it
+        self._undisplayed: Optional[Tuple[FileInfo, str]] = None
+        
+        # Providers and settings read in the monitoring loop are set during setup
         self.nextcloud_provider = None
         self.xibo_provider = None
+        self.copy_from = None
+        self.display_name = None
+        self.poll_interval = None
         
         # Get component loggers
         self.nextcloud_logger = get_component_logger('nextcloud', self.logger)
@@ -46,7 +97,16 @@ class XiboScreenUpdater:
         with LogContext(self.logger, "initialization"):
             # Load configuration
             config = self.config_manager.load_config(self.config_path)
-            self.logger.info(f"Loaded configuration from: {self.config_path}")
+            self.logger.info("Loaded configuration from: %s", self.config_path)
+            self.copy_from = self.config_manager.copy_from
+            self.display_name = self.config_manager.get_display_name()
+            self.poll_interval = self.config_manager.get_poll_interval()
+            self.seen_files.load()
+            # Resume from the previous run, so files changed while stopped are picked up
+            cursor = self.seen_files.get_cursor()
+            if cursor is not None:
+                self.latest_upload_ts = cursor
+                self.logger.info("Resuming from uploads after %s", cursor)
             
             # Initialize providers
             self.nextcloud_provider = create_nextcloud_provider(config)
@@ -62,124 +122,471 @@ class XiboScreenUpdater:
             self.logger.info("Successfully authenticated with Xibo CMS")
             
             # Log configuration summary
-            display_name = self.config_manager.get_display_name()
-            poll_interval = self.config_manager.get_poll_interval()
-            extensions = self.config_manager.get_extensions()
-            nextcloud_path = self.config_manager.get_nextcloud_config()['path']
+            self.logger.info("Configuration loaded:")
+            self.logger.info("  Display: %s", self.display_name)
+            self.logger.info("  NextCloud path: %s", self.copy_from.path)
+            self.logger.info("  Extensions: %s", self.copy_from.extensions)
+            self.logger.info("  Poll interval: %ss", self.poll_interval)
+    
+    def prefetch_file(self, file_info: FileInfo) -> Optional[BinaryIO]:
+        """
+        Download a file into a spooled temporary file ready for upload.
+        
+        Downloads cut short by a connection error or timeout are retried
+        with backoff; shutdown cuts the waits short.
+        
+        Args:
+            file_info: File information from NextCloud
+            
+        Returns:
+            File object positioned at the start, or None if the download failed
+        """
+        try:
+            return with_retries(partial(self._download, file_info), wait=self._stop.wait)
+        except Exception as e:
+            self.processor_logger.error("Error downloading %s: %s", file_info.name, e)
+            return None
+    
+    def _download(self, file_info: FileInfo) -> Optional[BinaryIO]:
+        """Make one attempt at downloading a file, discarding partial content on error."""
+        buffer = tempfile.SpooledTemporaryFile(max_size=PREFETCH_SPOOL_SIZE)
+        try:
+            stream = self.nextcloud_provider.open_stream(file_info.path)
+            if stream is None:
+                buffer.close()
+                return None
             
-            self.logger.info(f"Configuration loaded:")
-            self.logger.info(f"  Display: {display_name}")
-            self.logger.info(f"  NextCloud path: {nextcloud_path}")
-            self.logger.info(f"  Extensions: {extensions}")
-            self.logger.info(f"  Poll interval: {poll_interval}s")
+            with stream as source:
+                shutil.copyfileobj(source, buffer, COPY_CHUNK_SIZE)
+        except BaseException:
+            buffer.close()
+            raise
+        
+        buffer.seek(0)
+        return buffer
     
-    def process_file(self, file_info) -> bool:
+    def process_file(self, 
+        file_info: FileInfo, 
+        fileobj: Optional[BinaryIO] = None, 
+        show: bool = True
+    ) -> bool:
         """
-        Process a single file: download and upload to Xibo.
+        Process a single file: stream it from NextCloud and upload to Xibo.
         
         Args:
             file_info: File information from NextCloud
+            fileobj: Already downloaded content, streamed from NextCloud if omitted
+            show: Whether to put the file on the display; if not, the upload is
+                left for _show_undisplayed unless a later file is shown first
             
         Returns:
             True if successful, False otherwise
         """
         with LogContext(self.processor_logger, "file_processing", file=file_info.name):
             try:
-                # Download file to temporary location
-                temp_dir = "/tmp"  # Simple temp directory for now
-                local_path = f"{temp_dir}/{file_info.name}"
+                if not show and file_info.etag in self._media_ids:
+                    self._undisplayed = (file_info, self._media_ids[file_info.etag])
+                    return True
                 
-                downloaded_path = self.nextcloud_provider.download_file(file_info.path, local_path)
-                if not downloaded_path:
-                    return False
+                if show and self._show_cached_media(file_info):
+                    return True
                 
-                # Upload to Xibo
-                media_info = self.xibo_provider.upload_media(downloaded_path)
+                # Uploads and display updates are not safe to replay, so a
+                # failed file is left for the next cycle to queue again
+                media_info = self._upload(file_info, fileobj)
                 if not media_info:
                     return False
                 
-                # Set as display content
-                display_name = self.config_manager.get_display_name()
-                success = self.xibo_provider.set_display_content(
-                    str(media_info.get('mediaId')), 
-                    display_name
-                )
+                media_id = str(media_info.get('mediaId'))
+                if not show:
+                    self._remember_media(file_info, media_id)
+                    self._undisplayed = (file_info, media_id)
+                    self.processor_logger.info("Uploaded %s, a later file goes on display", file_info.name)
+                    return True
                 
-                # Cleanup downloaded file
-                import os
-                try:
-                    os.remove(downloaded_path)
-                except:
-                    pass
+                # Set as display content
+                success = self.xibo_provider.set_display_content(media_id, self.display_name)
                 
                 if success:
-                    self.processor_logger.info(f"Successfully processed {file_info.name}")
+                    self._undisplayed = None
+                    self._remember_media(file_info, media_id)
+                    self.processor_logger.info("Successfully processed %s", file_info.name)
                     return True
                 else:
-                    self.processor_logger.error(f"Failed to set display content for {file_info.name}")
+                    self.processor_logger.error("Failed to set display content for %s", file_info.name)
                     return False
                     
             except Exception as e:
-                self.processor_logger.error(f"Error processing {file_info.name}: {e}")
+                self.processor_logger.error("Error processing %s: %s", file_info.name, e)
                 return False
     
-    def run_monitoring_cycle(self):
-        """Run one monitoring cycle."""        
+    def _upload(self, file_info: FileInfo, fileobj: Optional[BinaryIO]) -> Optional[Dict]:
+        """Upload a file to the Xibo library."""
+        if fileobj is not None:
+            return self.xibo_provider.upload_media_stream(fileobj, file_info.name)
+        
+        # Stream the file from NextCloud straight into the Xibo upload
+        stream = self.nextcloud_provider.open_stream(file_info.path)
+        if stream is None:
+            return None
+        
+        with stream as source:
+            return self.xibo_provider.upload_media_stream(source, file_info.name)
+    
+    def _show_cached_media(self, file_info: FileInfo) -> bool:
+        """
+        Display media already uploaded for the same file version, if any.
+        
+        NextCloud keeps a file's etag when it is renamed or moved, so this
+        avoids uploading the same content again under a new name.
+        
+        Returns:
+            True if the cached media is now on display, False if it must be uploaded
+        """
+        media_id = self._media_ids.get(file_info.etag) if file_info.etag else None
+        if media_id is None:
+            return False
+        
+        self._media_ids.move_to_end(file_info.etag)
+        if self.xibo_provider.set_display_content(media_id, self.display_name):
+            self._undisplayed = None
+            self.processor_logger.info("Reused uploaded media %s for %s", media_id, file_info.name)
+            return True
+        
+        # The media may have been removed from the library, upload it again
+        del self._media_ids[file_info.etag]
+        return False
+    
+    def _show_undisplayed(self):
+        """Put the last file uploaded without a display update on the display."""
+        if self._undisplayed is None:
+            return
+        
+        file_info, media_id = self._undisplayed
+        self._undisplayed = None
+        if self.xibo_provider.set_display_content(media_id, self.display_name):
+            self.processor_logger.info("Successfully processed %s", file_info.name)
+        else:
+            self.processor_logger.error("Failed to set display content for %s", file_info.name)
+    
+    def _remember_media(self, file_info: FileInfo, media_id: str):
+        """Record the media uploaded for a file version, evicting the least recently used."""
+        if not file_info.etag:
+            return
+        self._media_ids[file_info.etag] = media_id
+        self._media_ids.move_to_end(file_info.etag)
+        if len(self._media_ids) > MEDIA_CACHE_SIZE:
+            self._media_ids.popitem(last=False)
+    
+    def _has_directory_activity(self) -> bool:
+        """
+        Check the NextCloud activity feed for changes in the monitored directory.
+        
+        Returns:
+            False only if the feed shows no change under the directory since the
+            last cycle, True if it did or the feed cannot tell
+        """
+        result = self.nextcloud_provider.get_activity_since(self._last_activity_id)
+        if not isinstance(result, tuple):
+            return True
+        
+        first_check = self._last_activity_id is None
+        self._last_activity_id, paths = result
+        if first_check or paths is None:
+            return True
+        
+        directory = self.copy_from.path.strip('/')
+        if not directory:
+            # Monitoring the root folder, so any change is relevant
+            return bool(paths)
+        prefix = directory + '/'
+        return any(path.lstrip('/').startswith(prefix) for path in paths)
+    
+    def run_monitoring_cycle(self) -> ProcessingStats:
+        """
+        Run one monitoring cycle.
+        
+        New files are queued for upload in the background, so the returned
+        stats cover the uploads that finished since the previous cycle.
+        
+        Returns:
+            Statistics for the uploads recorded in this cycle
+        """
+        stats = ProcessingStats()
+        self._collect_upload_results(stats)
+        self._queue_new_files()
+        return stats
+    
+    def _queue_new_files(self):
+        """List the monitored directory and queue settled, unseen files for upload."""
+        # Skip the directory listing when nothing changed since the last
+        # cycle, unless files are waiting for a second look
+        if not self._has_directory_activity() and not self._settling:
+            self.logger.debug("No file activity since last cycle")
+            return
+        
         # Get new files
+        copy_from = self.copy_from
         new_files = self.nextcloud_provider.get_new_files_since(
-            self.latest_upload_date,
-            self.config_manager.get_nextcloud_config()['path'],
-            self.config_manager.get_extensions()
+            self.latest_upload_ts,
+            copy_from.path,
+            copy_from.extensions
         )
         
+        if new_files is None:
+            # Keep settling and failed files for the next successful listing
+            return
         if not new_files:
-            return ProcessingStats()  # Empty stats
-        
-        # Process files
-        stats = ProcessingStats()
+            self._settling = {}
+            self.logger.debug("No new files found")
+            return
         
+        pending = []
+        settling = {}
         for file_info in new_files:
-            # Update latest upload date
-            self.latest_upload_date = max(self.latest_upload_date, file_info.upload_date)
+            # Skip files already processed with the same version or queued
+            if file_info in self.seen_files or file_info.name in self._in_flight:
+                continue
             
-            # Process file
-            if self.process_file(file_info):
+            # Only pick up files that look the same in two consecutive
+            # listings, so uploads still being written are left alone
+            version = SeenFileCache.version(file_info)
+            if self._settling.get(file_info.name) != version:
+                settling[file_info.name] = version
+                continue
+            pending.append(file_info)
+        
+        self._settling = settling
+        self._queue_uploads(pending, copy_from.max_parallel_downloads)
+        self._latest_listed_ts = max(
+            self._latest_listed_ts, max(file_info.upload_ts for file_info in new_files)
+        )
+        self._advance_cursor()
+    
+    def _collect_upload_results(self, stats: ProcessingStats):
+        """Record finished uploads in the seen files database and the given stats."""
+        collected = False
+        while True:
+            try:
+                file_info, success = self._upload_results.get_nowait()
+            except queue.Empty:
+                break
+            
+            collected = True
+            self._in_flight.pop(file_info.name, None)
+            if success:
+                self.seen_files.add(file_info)
                 stats.add_success()
             else:
+                # Keep the file behind the cursor; the next listing queues it
+                # again without waiting for it to settle
+                self._settling[file_info.name] = SeenFileCache.version(file_info)
                 stats.add_failure()
         
+        if stats.succeeded:
+            self.seen_files.save()
+        if collected:
+            self._advance_cursor()
+    
+    def _advance_cursor(self):
+        """Move latest_upload_ts up to the newest listed file, short of files not yet uploaded."""
+        latest = self._latest_listed_ts
+        # Settling and failed files, by the upload time in their version
+        held = [version[1] for version in self._settling.values()]
+        held.extend(self._in_flight.values())
+        if held:
+            latest = min(latest, min(held) - 1)
+        if latest > self.latest_upload_ts:
+            self.latest_upload_ts = latest
+            self.seen_files.set_cursor(latest)
+            self.seen_files.save()
+    
+    def _queue_uploads(self, files: List[FileInfo], max_workers: int):
+        """
+        Queue files for upload in listing order.
+        
+        Files are uploaded one at a time, so the last file listed is the one
+        left on the display. The uploader downloads up to max_workers of the
+        files queued behind the current upload meanwhile, so downloads run
+        ahead of uploads without buffering the whole backlog.
+        
+        Args:
+            files: Files to upload
+            max_workers: Maximum number of concurrent downloads
+        """
+        if not files:
+            return
+        
+        for file_info in files:
+            # Held back from the cursor until _collect_upload_results records it
+            self._in_flight[file_info.name] = file_info.upload_ts
+            self._upload_queue.put(file_info)
+        
+        # Started after the files are queued, so the first one sees those behind it
+        if self._uploader is None or not self._uploader.is_alive():
+            self._uploader = threading.Thread(
+                target=self._upload_worker,
+                args=(max_workers,),
+                name='xibo-uploader',
+                daemon=True
+            )
+            self._uploader.start()
+    
+    def _upload_worker(self, max_downloads: int = 1):
+        """
+        Upload queued files until a None sentinel is received.
+        
+        A file taken straight from the queue is streamed into its upload,
+        while up to max_downloads files queued behind it are downloaded.
+        
+        Args:
+            max_downloads: Maximum number of files downloaded ahead of the upload
+        """
+        max_downloads = max(1, max_downloads)
+        # Files taken from the queue behind the current one, with their downloads
+        ahead: "deque[Optional[Tuple[FileInfo, Future]]]" = deque()
+        with ThreadPoolExecutor(max_workers=max_downloads, thread_name_prefix='nextcloud-download') as pool:
+            while True:
+                if ahead:
+                    item = ahead.popleft()
+                else:
+                    file_info = self._upload_queue.get()
+                    item = None if file_info is None else (file_info, None)
+                try:
+                    # Download the next queued files, up to the sentinel, while this one uploads
+                    while len(ahead) < max_downloads and not (ahead and ahead[-1] is None):
+                        try:
+                            file_info = self._upload_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if file_info is None:
+                            ahead.append(None)
+                            continue
+                        ahead.append((file_info, pool.submit(self.prefetch_file, file_info)))
+                    
+                    # Every display update replaces the previous one, so files
+                    # with another queued behind them are only uploaded
+                    last = ahead[0] is None if ahead else self._upload_queue.empty()
+                    if item is not None:
+                        self._upload_results.put((item[0], self._upload_item(*item, show=last)))
+                    
+                    # Show the last upload if the files queued after it failed
+                    if last:
+                        self._show_undisplayed()
+                    if item is None:
+                        return
+                finally:
+                    self._upload_queue.task_done()
+    
+    def _upload_item(self, file_info: FileInfo, download: Optional[Future], show: bool) -> bool:
+        """Upload a queued file, from its finished download if it has one."""
+        if download is None:
+            return self.process_file(file_info, show=show)
+        
+        fileobj = download.result()
+        if fileobj is None:
+            return False
+        try:
+            return self.process_file(file_info, fileobj, show=show)
+        finally:
+            fileobj.close()
+    
+    def wait_for_uploads(self) -> ProcessingStats:
+        """
+        Block until every queued upload has finished and record the results.
+        
+        Returns:
+            Statistics for the uploads recorded
+        """
+        self._upload_queue.join()
+        stats = ProcessingStats()
+        self._collect_upload_results(stats)
         return stats
     
+    def _stop_uploader(self):
+        """Let the uploader finish queued files, then record their results."""
+        if self._uploader is None:
+            return
+        
+        self._upload_queue.put(None)
+        self._uploader.join(UPLOAD_SHUTDOWN_TIMEOUT)
+        if self._uploader.is_alive():
+            self.logger.warning("Uploads still running after %ss, exiting anyway", UPLOAD_SHUTDOWN_TIMEOUT)
+        self._uploader = None
+        self._collect_upload_results(ProcessingStats())
+    
+    def stop(self):
+        """Ask the monitoring loop to exit, interrupting any wait in progress."""
+        self._stop.set()
+    
+    def close(self):
+        """Finish queued uploads, then release the seen files database and HTTP sessions."""
+        self._stop_uploader()
+        self.seen_files.close()
+        for provider in (self.nextcloud_provider, self.xibo_provider):
+            if provider is not None:
+                provider.close()
+    
+    def _next_poll_interval(self, poll_interval: int) -> float:
+        """Get the wait before the next cycle, doubling it for each consecutive failure."""
+        if not self._consecutive_errors:
+            return poll_interval
+        backoff = poll_interval * (2 ** min(self._consecutive_errors, 16))
+        return max(poll_interval, min(backoff, MAX_BACKOFF_INTERVAL))
+    
     def run(self):
         """Run the main monitoring loop."""
         self.logger.info("Starting Xibo Screen Updater")
         
+        previous_handler = None
+        try:
+            previous_handler = signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        except ValueError:
+            pass  # Not running in the main thread, rely on stop() instead
+        
         try:
             self.initialize()
-            poll_interval = self.config_manager.get_poll_interval()
+            poll_interval = self.poll_interval
             
             self.logger.info("Starting monitoring loop")
-            self.logger.info("-" * 50)
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("-" * 50)
             
-            while True:
+            # Cycles start on a fixed grid, so their own duration doesn't add to the interval
+            deadline = time.monotonic()
+            while not self._stop.is_set():
                 try:
                     stats = self.run_monitoring_cycle()
+                    self._consecutive_errors = 0
                     
-                    if stats.processed > 0:
+                    if stats.processed > 0 and self.logger.isEnabledFor(logging.INFO):
                         self.logger.info(stats.get_summary())
                     
                 except Exception as e:
-                    self.logger.error(f"Error in monitoring cycle: {e}")
+                    self._consecutive_errors += 1
+                    self.logger.error("Error in monitoring cycle: %s", e)
                     self.logger.debug("Full traceback:", exc_info=True)
                 
-                sleep(poll_interval)
+                deadline += self._next_poll_interval(poll_interval)
+                now = time.monotonic()
+                if now - deadline > 2 * poll_interval:
+                    # Skip the missed polls rather than running them back to back
+                    self.logger.warning("Monitoring cycle overran by %.0fs, skipping missed polls", now - deadline)
+                    deadline = now + poll_interval
+                self._stop.wait(max(0, deadline - now))
+            
+            self.logger.info("Monitoring loop stopped")
                 
         except KeyboardInterrupt:
             self.logger.info("Received interrupt signal, shutting down...")
         except Exception as e:
-            self.logger.error(f"Fatal error: {e}")
+            self.logger.error("Fatal error: %s", e)
             self.logger.debug("Full traceback:", exc_info=True)
             sys.exit(1)
+        finally:
+            self.close()
+            if previous_handler is not None:
+                signal.signal(signal.SIGTERM, previous_handler)
 
 
 def main():
@@ -191,6 +598,9 @@ def main():
     parser.add_argument('-c', '--config', type=str, help='Path to configuration file')
     args = parser.parse_args()
     
+    # Set up logging first, so errors before the application starts are formatted too
+    logger = setup_logging()
+    
     try:
         # Resolve configuration file path
         config_path = resolve_config_path(args.config)
@@ -200,10 +610,10 @@ def main():
         app.run()
         
     except ConfigurationError as e:
-        print(f"❌ Configuration error: {e}")
+        logger.error("Configuration error: %s", e)
         sys.exit(1)
     except Exception as e:
-        print(f"❌ Fatal error: {e}")
+        logger.error("Fatal error: %s", e)
         sys.exit(1)
 
 
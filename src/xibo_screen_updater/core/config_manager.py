@@ -4,13 +4,54 @@ Configuration management module for Xibo Screen Updater.
 Provides centralized configuration loading, validation, and management.
 """
 
+import copy
 import os
 import sys
 import yaml
-from typing import Dict, Any, Optional
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
 from dataclasses import dataclass
 
-from ..types.config import ConfigurationError
+from ..types.config import ConfigurationError, CopyFromConfig, ProjectToConfig
+
+# Prefer the LibYAML-backed loader when PyYAML was built against it
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+# Validated configs keyed by (absolute path, mtime in ns, size in bytes)
+_CONFIG_CACHE: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+
+# Required fields for each configuration section, keyed by dotted section path
+CONFIG_SCHEMA: Dict[str, Tuple[str, ...]] = {
+    'copy_from': ('provider', 'server', 'path', 'auth', 'extensions'),
+    'copy_from.auth': ('user', 'password'),
+    'project_to': ('provider', 'host', 'auth', 'display'),
+    'project_to.auth': ('client_id', 'client_secret'),
+    'project_to.display': ('name',),
+}
+
+
+def _compile_schema(
+    schema: Dict[str, Tuple[str, ...]]
+) -> List[Tuple[str, Tuple[str, ...], FrozenSet[str]]]:
+    """
+    Compile a section schema into (section, key path, required fields) rules.
+    
+    Args:
+        schema: Mapping of dotted section paths to their required fields
+        
+    Returns:
+        List of rules ready to be applied to a configuration dictionary
+    """
+    return [
+        (section, tuple(section.split('.')), frozenset(fields)) 
+        for section, fields in schema.items()
+    ]
+
+
+# Compiled once at import and reused by every ConfigManager instance
+_SCHEMA_RULES = _compile_schema(CONFIG_SCHEMA)
 
 
 @dataclass
@@ -22,11 +63,7 @@ class ConfigPaths:
     
     def resolve(self) -> str:
         """Resolve configuration file path using priority order."""
-        if self.cli_arg:
-            return self.cli_arg
-        if self.env_var:
-            return self.env_var
-        return self.default
+        return next(path for path in (self.cli_arg, self.env_var, self.default) if path)
 
 
 class ConfigManager:
@@ -35,6 +72,8 @@ class ConfigManager:
     def __init__(self):
         self._config: Optional[Dict[str, Any]] = None
         self._config_path: Optional[str] = None
+        self._copy_from: Optional[CopyFromConfig] = None
+        self._project_to: Optional[ProjectToConfig] = None
     
     def load_config(self, config_path: str) -> Dict[str, Any]:
         """
@@ -53,11 +92,22 @@ class ConfigManager:
             if not os.path.exists(config_path):
                 raise ConfigurationError(f"Configuration file not found: {config_path}")
             
+            st = os.stat(config_path)
+            cache_key = (os.path.abspath(config_path), st.st_mtime_ns, st.st_size)
+            cached = _CONFIG_CACHE.get(cache_key)
+            if cached is not None:
+                self._config = copy.deepcopy(cached)
+                self._config_path = config_path
+                self._build_sections()
+                return self._config
+            
             with open(config_path, 'r') as file:
-                self._config = yaml.safe_load(file)
+                self._config = yaml.load(file.read(), Loader=SafeLoader)
             
             self._config_path = config_path
             self._validate_config()
+            self._build_sections()
+            _CONFIG_CACHE[cache_key] = copy.deepcopy(self._config)
             return self._config
             
         except yaml.YAMLError as e:
@@ -70,29 +120,19 @@ class ConfigManager:
         if not self._config:
             raise ConfigurationError("Configuration is empty")
         
-        # Validate copy_from section
-        copy_from = self._config.get('copy_from', {})
-        required_copy_from = ['provider', 'server', 'path', 'auth', 'extensions']
-        for field in required_copy_from:
-            if field not in copy_from:
-                raise ConfigurationError(f"Missing required field in copy_from: {field}")
-        
-        # Validate copy_from.auth
-        auth = copy_from.get('auth', {})
-        if 'user' not in auth or 'password' not in auth:
-            raise ConfigurationError("Missing user or password in copy_from.auth")
-        
-        # Validate project_to section
-        project_to = self._config.get('project_to', {})
-        required_project_to = ['provider', 'host', 'auth', 'display']
-        for field in required_project_to:
-            if field not in project_to:
-                raise ConfigurationError(f"Missing required field in project_to: {field}")
-        
-        # Validate project_to.auth
-        xibo_auth = project_to.get('auth', {})
-        if 'client_id' not in xibo_auth or 'client_secret' not in xibo_auth:
-            raise ConfigurationError("Missing client_id or client_secret in project_to.auth")
+        for section, key_path, required in _SCHEMA_RULES:
+            node = self._config
+            for key in key_path:
+                node = node.get(key) if isinstance(node, dict) else None
+            if not isinstance(node, dict):
+                node = {}
+            missing = required.difference(node)
+            if missing:
+                raise ConfigurationError(
+                    f"Missing required field in {section}: {', '.join(sorted(missing))}"
+                )
+
+        project_to = self._config['project_to']
 
         # Validate project_to.criteria
         if project_to.get('criteria') is None:
@@ -100,6 +140,11 @@ class ConfigManager:
         if project_to['criteria'] and not isinstance(project_to['criteria'], list):
             raise ConfigurationError("Criteria must be a list")
     
+    def _build_sections(self):
+        """Parse the validated sections once into typed, read-only objects."""
+        self._copy_from = CopyFromConfig.from_dict(self._config['copy_from'])
+        self._project_to = ProjectToConfig.from_dict(self._config['project_to'])
+    
     @property
     def config(self) -> Dict[str, Any]:
         """Get current configuration."""
@@ -114,6 +159,20 @@ class ConfigManager:
             raise ConfigurationError("Configuration not loaded")
         return self._config_path
     
+    @property
+    def copy_from(self) -> CopyFromConfig:
+        """Get parsed source settings."""
+        if not self._copy_from:
+            raise ConfigurationError("Configuration not loaded")
+        return self._copy_from
+    
+    @property
+    def project_to(self) -> ProjectToConfig:
+        """Get parsed destination settings."""
+        if not self._project_to:
+            raise ConfigurationError("Configuration not loaded")
+        return self._project_to
+    
     def get_nextcloud_config(self) -> Dict[str, Any]:
         """Get NextCloud configuration section."""
         return self.config.get('copy_from', {})
@@ -124,15 +183,15 @@ class ConfigManager:
     
     def get_display_name(self) -> str:
         """Get target display name."""
-        return self.config['project_to']['display']['name']
+        return self.project_to.display_name
     
     def get_poll_interval(self) -> int:
         """Get polling interval in seconds."""
-        return self.config['copy_from'].get('poll_interval', 10)
+        return self.copy_from.poll_interval
     
-    def get_extensions(self) -> list:
-        """Get file extensions to monitor."""
-        return self.config['copy_from'].get('extensions', [])
+    def get_extensions(self) -> Tuple[str, ...]:
+        """Get lowercased file extensions to monitor, usable with str.endswith."""
+        return self.copy_from.extensions
 
 
 def resolve_config_path(cli_arg: Optional[str] = None) -> str:
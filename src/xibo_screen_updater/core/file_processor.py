@@ -4,18 +4,20 @@ File processor module for handling NextCloud file operations.
 Provides file detection, downloading, and processing coordination.
 """
 
+import atexit
 import os
 import tempfile
 import shutil
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 import logging
 
 from ..providers.nextcloud import NextCloudProvider
-from ..types.file_info import FileInfo
+from ..types.file_info import DATACLASS_SLOTS, FileInfo
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class ProcessingResult:
     """Result of file processing operation."""
     success: bool
@@ -26,17 +28,22 @@ class ProcessingResult:
 class FileProcessor:
     """Handles NextCloud file operations and processing."""
     
-    def __init__(self, config: Dict[str, Any], logger: logging.Logger):
+    def __init__(self, 
+        config: Dict[str, Any], 
+        logger: logging.Logger, 
+        client: Optional[NextCloudProvider] = None
+    ):
         """
         Initialize file processor.
         
         Args:
             config: NextCloud configuration
             logger: Logger instance
+            client: Already connected NextCloud provider to reuse, if any
         """
         self.config = config
         self.logger = logger
-        self._client: Optional[NextCloudProvider] = None
+        self._client: Optional[NextCloudProvider] = client
         self._temp_dir: Optional[str] = None
     
     def __enter__(self):
@@ -50,65 +57,65 @@ class FileProcessor:
         self._cleanup_temp_dir()
     
     def _setup_temp_dir(self):
-        """Create temporary directory for downloads."""
+        """Create the temporary download directory once and reuse it afterwards."""
+        if self._temp_dir:
+            return
+        
         self._temp_dir = tempfile.mkdtemp(prefix="xibo_upload_")
-        self.logger.info(f"Created temporary directory: {self._temp_dir}")
+        # Removed on context exit, or at interpreter exit if used without one
+        atexit.register(self._cleanup_temp_dir)
+        self.logger.info("Created temporary directory: %s", self._temp_dir)
     
     def _cleanup_temp_dir(self):
         """Clean up temporary directory."""
-        if self._temp_dir and os.path.exists(self._temp_dir):
-            shutil.rmtree(self._temp_dir, ignore_errors=True)
-            self.logger.info(f"Cleaned up temporary directory: {self._temp_dir}")
+        if not self._temp_dir:
+            return
+        
+        atexit.unregister(self._cleanup_temp_dir)
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+        self.logger.info("Cleaned up temporary directory: %s", self._temp_dir)
+        self._temp_dir = None
     
     def _setup_client(self):
-        """Initialize NextCloud client."""
+        """Initialize NextCloud client unless one was provided."""
+        if self._client is not None:
+            return
+        
         self._client = NextCloudProvider(
             self.config['server'],
             self.config['auth']['user'],
             self.config['auth']['password']
         )
-        self.logger.info(f"Initialized NextCloud client for {self.config['server']}")
+        self.logger.info("Initialized NextCloud client for %s", self.config['server'])
     
-    def get_new_files(self, since: datetime) -> List[FileInfo]:
+    def get_new_files(self, since: int) -> List[FileInfo]:
         """
         Get files uploaded since the given timestamp.
         
         Args:
-            since: Only return files uploaded after this time
+            since: Unix timestamp, only files uploaded after it are returned
             
         Returns:
             List of new file information
         """
         try:
-            files_data = self._client.get_files(
+            files = self._client.get_new_files_since(
+                since,
                 directory_path=self.config['path'],
                 extensions=self.config['extensions']
             )
-            
-            new_files = []
-            for file_data in files_data:
-                upload_date = file_data.get('upload_date')
-                if upload_date and upload_date > since:
-                    file_info = FileInfo(
-                        name=file_data['name'],
-                        path=file_data.get('path', file_data['name']),
-                        upload_date=upload_date,
-                        size=file_data.get('size'),
-                        content_type=file_data.get('content_type'),
-                        etag=file_data.get('etag')
-                    )
-                    new_files.append(file_info)
-            
-            self.logger.info(f"Found {len(new_files)} new files since {since}")
-            return new_files
+            return files or []
             
         except Exception as e:
-            self.logger.error(f"Error getting file list: {e}")
+            self.logger.error("Error getting file list: %s", e)
             return []
     
     def download_file(self, file_info: FileInfo) -> Optional[str]:
         """
-        Download a file to temporary directory.
+        Download a file to the processor's temporary directory.
+        
+        The directory is created on first use and shared by every download;
+        callers remove individual files with cleanup_file.
         
         Args:
             file_info: File information
@@ -117,34 +124,60 @@ class FileProcessor:
             Local path to downloaded file, or None if failed
         """
         try:
-            if not self._temp_dir:
-                raise RuntimeError("Temporary directory not initialized")
+            self._setup_temp_dir()
+            self._setup_client()
             
             local_path = os.path.join(self._temp_dir, file_info.name)
-            remote_path = f"{self.config['path']}/{file_info.name}"
             
-            self.logger.info(f"Downloading {file_info.name}")
-            downloaded_path = self._client.download_file(remote_path, local_path)
+            self.logger.debug("Downloading %s", file_info.name)
+            downloaded_path = self._client.download_file(file_info.path, local_path)
             
             if downloaded_path and os.path.exists(downloaded_path):
-                self.logger.info(f"Successfully downloaded: {downloaded_path}")
+                self.logger.debug("Successfully downloaded: %s", downloaded_path)
                 return downloaded_path
             else:
-                self.logger.error(f"Download failed for {file_info.name}")
+                self.logger.error("Download failed for %s", file_info.name)
                 return None
                 
         except Exception as e:
-            self.logger.error(f"Error downloading {file_info.name}: {e}")
+            self.logger.error("Error downloading %s: %s", file_info.name, e)
             return None
     
+    def download_files(self, 
+        files: List[FileInfo], 
+        max_workers: int = 4
+    ) -> List[Tuple[FileInfo, Optional[str]]]:
+        """
+        Download several files at once over the provider's pooled connections.
+        
+        Args:
+            files: Files to download
+            max_workers: Maximum number of concurrent downloads
+            
+        Returns:
+            Each file with its local path, or None if its download failed, in
+            the order given
+        """
+        if not files:
+            return []
+        
+        # Set up shared state before the workers race to do it
+        self._setup_temp_dir()
+        self._setup_client()
+        
+        workers = max(1, min(max_workers, len(files)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(zip(files, pool.map(self.download_file, files)))
+    
     def cleanup_file(self, file_path: str):
         """Clean up a downloaded file."""
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                self.logger.debug(f"Cleaned up file: {file_path}")
+            os.unlink(file_path)
+            self.logger.debug("Cleaned up file: %s", file_path)
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            self.logger.warning(f"Failed to cleanup file {file_path}: {e}")
+            self.logger.warning("Failed to cleanup file %s: %s", file_path, e)
 
 
 class ProcessingStats:
@@ -154,7 +187,7 @@ class ProcessingStats:
         self.processed = 0
         self.succeeded = 0
         self.failed = 0
-        self.start_time = datetime.utcnow()
+        self.start_time = time.monotonic()
     
     def add_success(self):
         """Record a successful processing."""
@@ -168,6 +201,6 @@ class ProcessingStats:
     
     def get_summary(self) -> str:
         """Get processing summary."""
-        duration = datetime.utcnow() - self.start_time
-        return (f"Processed {self.processed} files in {duration.total_seconds():.1f}s: "
+        duration = time.monotonic() - self.start_time
+        return (f"Processed {self.processed} files in {duration:.1f}s: "
                 f"{self.succeeded} succeeded, {self.failed} failed")
@@ -4,11 +4,34 @@ Logging configuration and utilities for Xibo Screen Updater.
 Provides structured logging with timestamps, levels, and component identification.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
-from datetime import datetime
+import time
 from typing import Optional
 
+# Level names accepted by setup_logging and LogContext.log_progress
+_LEVELS = {
+    'DEBUG': logging.DEBUG,
+    'INFO': logging.INFO,
+    'WARNING': logging.WARNING,
+    'ERROR': logging.ERROR,
+    'CRITICAL': logging.CRITICAL,
+}
+
+# Writes queued records to the console and file handlers, see setup_logging
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _resolve_level(level: str) -> int:
+    """Map a level name to its number, defaulting to INFO for unknown names."""
+    levelno = _LEVELS.get(level)
+    if levelno is None:
+        levelno = _LEVELS.get(level.upper(), logging.INFO)
+    return levelno
+
 
 class ColoredFormatter(logging.Formatter):
     """Colored log formatter for console output."""
@@ -23,10 +46,42 @@ class ColoredFormatter(logging.Formatter):
     }
     RESET = '\033[0m'
     
+    # Console format with a direct fast path in format()
+    CONSOLE_FORMAT = '%(asctime)s [%(levelname_colored)s] %(name)s: %(message)s'
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Precompute colored level names once instead of per record
+        self._colored = {level: f"{color}{level}{self.RESET}" for level, color in self.COLORS.items()}
+        self._fast_path = (
+            self._fmt == self.CONSOLE_FORMAT and isinstance(self._style, logging.PercentStyle)
+        )
+        self._last_sec: Optional[int] = None
+        self._last_str = ''
+    
+    def formatTime(self, record, datefmt=None):
+        # Without datefmt the default includes milliseconds, so it can't be cached
+        if not datefmt:
+            return super().formatTime(record, datefmt)
+        
+        # Records logged within the same second share the formatted timestamp
+        sec = int(record.created)
+        if sec != self._last_sec:
+            self._last_str = time.strftime(datefmt, self.converter(sec))
+            self._last_sec = sec
+        return self._last_str
+    
     def format(self, record):
-        # Add color to level name
-        level_color = self.COLORS.get(record.levelname, '')
-        record.levelname = f"{level_color}{record.levelname}{self.RESET}"
+        # Expose the colored level name without mutating the shared record,
+        # so other handlers (e.g. the log file) keep the plain levelname
+        record.levelname_colored = self._colored.get(record.levelname, record.levelname)
+        
+        # Plain records in the console format are assembled in a single step
+        if self._fast_path and not (record.exc_info or record.exc_text or record.stack_info):
+            record.message = record.getMessage()
+            record.asctime = self.formatTime(record, self.datefmt)
+            return f"{record.asctime} [{record.levelname_colored}] {record.name}: {record.message}"
+        
         return super().format(record)
 
 
@@ -41,35 +96,69 @@ def setup_logging(level: str = "INFO", log_file: Optional[str] = None) -> loggin
     Returns:
         Configured logger instance
     """
+    global _listener
+    
     # Create main logger
     logger = logging.getLogger('xibo_screen_updater')
-    logger.setLevel(getattr(logging, level.upper()))
+    logger.setLevel(_resolve_level(level))
     
-    # Clear any existing handlers
+    # Clear any existing handlers, flushing buffered records first
+    stop_logging()
+    for handler in logger.handlers:
+        handler.close()
     logger.handlers.clear()
     
     # Console handler with colors
     console_handler = logging.StreamHandler(sys.stdout)
-    console_formatter = ColoredFormatter(
-        '%(asctime)s [%(levelname)s] %(name)s: %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    console_formatter = ColoredFormatter(ColoredFormatter.CONSOLE_FORMAT, datefmt='%Y-%m-%d %H:%M:%S')
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
     
-    # File handler if specified
+    # File handler if specified, buffered so INFO records are written in batches
+    # while ERROR and above are flushed immediately
     if log_file:
-        file_handler = logging.FileHandler(log_file)
+        file_handler = logging.FileHandler(log_file, delay=True)
         file_formatter = logging.Formatter(
             '%(asctime)s [%(levelname)s] %(name)s: %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
         file_handler.setFormatter(file_formatter)
-        logger.addHandler(file_handler)
+        memory_handler = logging.handlers.MemoryHandler(
+            capacity=256, 
+            flushLevel=logging.ERROR, 
+            target=file_handler
+        )
+        handlers.append(memory_handler)
+    
+    # Threads only enqueue records; a background listener does the writing,
+    # so slow consoles or disks never hold up downloads and uploads
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
     
     return logger
 
 
+def stop_logging():
+    """Write out every queued record and stop the background log writer."""
+    global _listener
+    
+    if _listener is None:
+        return
+    
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+        if isinstance(handler, logging.handlers.MemoryHandler) and handler.target:
+            handler.target.close()
+    _listener = None
+
+
+# Flush queued records before the logging module shuts down its handlers
+atexit.register(stop_logging)
+
+
 def get_component_logger(component: str, parent_logger: Optional[logging.Logger] = None) -> logging.Logger:
     """
     Get a logger for a specific component.
@@ -97,17 +186,25 @@ class LogContext:
         self.start_time = None
     
     def __enter__(self):
-        self.start_time = datetime.utcnow()
+        self.start_time = time.monotonic()
+        if not self.logger.isEnabledFor(logging.INFO):
+            return self
+        
         context_str = ', '.join(f"{k}={v}" for k, v in self.context.items())
-        self.logger.info(f"Starting {self.operation}" + (f" ({context_str})" if context_str else ""))
+        if context_str:
+            self.logger.info("Starting %s (%s)", self.operation, context_str)
+        else:
+            self.logger.info("Starting %s", self.operation)
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        duration = datetime.utcnow() - self.start_time
         if exc_type is None:
-            self.logger.info(f"Completed {self.operation} in {duration.total_seconds():.2f}s")
-        else:
-            self.logger.error(f"Failed {self.operation} after {duration.total_seconds():.2f}s: {exc_val}")
+            if self.logger.isEnabledFor(logging.INFO):
+                duration = time.monotonic() - self.start_time
+                self.logger.info("Completed %s in %.2fs", self.operation, duration)
+        elif self.logger.isEnabledFor(logging.ERROR):
+            duration = time.monotonic() - self.start_time
+            self.logger.error("Failed %s after %.2fs: %s", self.operation, duration, exc_val)
     
     def update_context(self, **kwargs):
         """Update context information."""
@@ -115,4 +212,4 @@ class LogContext:
     
     def log_progress(self, message: str, level: str = "INFO"):
         """Log a progress message."""
-        getattr(self.logger, level.lower())(f"{self.operation}: {message}")
+        self.logger.log(_resolve_level(level), "%s: %s", self.operation, message)
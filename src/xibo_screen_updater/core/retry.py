@@ -0,0 +1,75 @@
+"""
+Retry helper for calls to remote services.
+
+Only raised errors that may clear on their own are retried. Falsy results,
+which providers use for failures such as a missing display, are returned
+as they are, and calls that are not safe to repeat, like uploads and other
+writes, should not be wrapped at all.
+"""
+
+import time
+from typing import Any, Callable, TypeVar
+
+import requests
+import urllib3
+
+T = TypeVar('T')
+
+# Attempts per call and the base of the exponential delay between them
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 2
+
+# Connection failures and timeouts, including those hit while reading a raw response body
+TRANSIENT_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    urllib3.exceptions.ProtocolError,
+    urllib3.exceptions.TimeoutError
+)
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Check whether a raised error may clear on its own.
+
+    Args:
+        error: Error raised by a call to a remote service
+
+    Returns:
+        True for connection errors, timeouts and HTTP 5xx responses
+    """
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and error.response.status_code >= 500
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+def with_retries(
+        fn: Callable[[], T],
+        max_attempts: int = MAX_ATTEMPTS,
+        base: float = BACKOFF_BASE,
+        wait: Callable[[float], Any] = time.sleep
+    ) -> T:
+    """
+    Call fn until it stops raising transient errors, waiting base ** attempt seconds between attempts.
+
+    Args:
+        fn: Call to make, safe to repeat after a failed attempt
+        max_attempts: Maximum number of calls
+        base: Base of the exponential delay, in seconds
+        wait: Called with each delay; a true return value, as from
+            threading.Event.wait once the event is set, stops retrying
+
+    Returns:
+        The result of the first call that did not raise
+
+    Raises:
+        Exception: The error of the last attempt, or any error that is not transient
+    """
+    for attempt in range(max_attempts):
+        try:
+            return fn()
+        except Exception as e:
+            # Give up on the last attempt, on errors a retry won't fix, or on shutdown
+            if attempt == max_attempts - 1 or not is_transient(e) or wait(base ** attempt):
+                raise
@@ -0,0 +1,123 @@
+"""
+Seen-file tracking for Xibo Screen Updater.
+
+Keeps a persistent record of the version of each file that has already been
+processed, so restarts do not trigger duplicate uploads and modified files
+are uploaded again. The monitoring cursor is stored alongside, so a restart
+resumes from where the previous run stopped.
+"""
+
+import logging
+import os
+import sqlite3
+from typing import Optional, Tuple
+
+from ..types.file_info import FileInfo
+
+# Version of a processed file: (etag, mtime in epoch seconds, size)
+FileVersion = Tuple[Optional[str], int, int]
+
+
+def default_seen_files_path() -> str:
+    """Get the default database location under the user's cache directory."""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'xibo-screen-updater', 'seen.db')
+
+
+class SeenFileCache:
+    """Processed files keyed by name, optionally persisted to SQLite."""
+    
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            path: Optional SQLite database used to persist entries across restarts
+        """
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._db: Optional[sqlite3.Connection] = None
+    
+    @property
+    def db(self) -> sqlite3.Connection:
+        """Get the database connection, opening it on first use."""
+        if self._db is None:
+            self._db = self._connect()
+        return self._db
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database, falling back to memory if the file is unusable."""
+        db = None
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                db = sqlite3.connect(self.path)
+            except (OSError, sqlite3.Error) as e:
+                self.logger.warning("Could not open seen files database %s: %s", self.path, e)
+        if db is None:
+            db = sqlite3.connect(':memory:')
+        
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS seen_files '
+            '(name TEXT PRIMARY KEY, etag TEXT, mtime INTEGER, size INTEGER)'
+        )
+        db.execute('CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER)')
+        return db
+    
+    @staticmethod
+    def version(file_info: FileInfo) -> FileVersion:
+        """Build the version that must match for a file to count as seen."""
+        return (
+            file_info.etag,
+            file_info.upload_ts,
+            file_info.size
+        )
+    
+    def get(self, name: str) -> Optional[FileVersion]:
+        """Get the recorded version of a file, or None if it was never processed."""
+        row = self.db.execute(
+            'SELECT etag, mtime, size FROM seen_files WHERE name = ?', (name,)
+        ).fetchone()
+        return tuple(row) if row else None
+    
+    def __contains__(self, file_info: FileInfo) -> bool:
+        return self.get(file_info.name) == self.version(file_info)
+    
+    def __len__(self) -> int:
+        return self.db.execute('SELECT COUNT(*) FROM seen_files').fetchone()[0]
+    
+    def add(self, file_info: FileInfo):
+        """Record the current version of a file as processed."""
+        self.db.execute(
+            'INSERT OR REPLACE INTO seen_files (name, etag, mtime, size) VALUES (?, ?, ?, ?)',
+            (file_info.name, *self.version(file_info))
+        )
+    
+    def get_cursor(self) -> Optional[int]:
+        """Get the upload timestamp the monitoring loop had reached, if one was saved."""
+        row = self.db.execute("SELECT value FROM state WHERE key = 'latest_upload_ts'").fetchone()
+        return row[0] if row else None
+    
+    def set_cursor(self, upload_ts: int):
+        """Record the upload timestamp the monitoring loop has reached."""
+        self.db.execute(
+            "INSERT OR REPLACE INTO state (key, value) VALUES ('latest_upload_ts', ?)", (upload_ts,)
+        )
+    
+    def load(self):
+        """Open the database so lookups see entries persisted by earlier runs."""
+        self.logger.debug("Tracking %d previously processed files", len(self))
+    
+    def save(self):
+        """Persist entries added since the last save."""
+        try:
+            self.db.commit()
+        except sqlite3.Error as e:
+            self.logger.warning("Could not save seen files to %s: %s", self.path, e)
+    
+    def close(self):
+        """Commit pending entries and close the database."""
+        if self._db is not None:
+            self.save()
+            self._db.close()
+            self._db = None
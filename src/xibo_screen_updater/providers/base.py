@@ -6,8 +6,7 @@ enabling pluggable architecture for different source and destination services.
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import BinaryIO, ContextManager, List, Dict, Any, Optional
 from dataclasses import dataclass
 
 from ..types.file_info import FileInfo
@@ -56,24 +55,41 @@ class SourceProvider(ABC):
         """
         pass
     
+    @abstractmethod
+    def open_stream(self, file_path: str) -> Optional[ContextManager[BinaryIO]]:
+        """
+        Open a streaming download of a file from the source.
+        
+        Args:
+            file_path: Remote path of the file
+            
+        Returns:
+            Context manager yielding a readable binary stream, None on failure
+        """
+        pass
+    
     @abstractmethod
     def get_new_files_since(self, 
-        timestamp: datetime, 
+        timestamp: int, 
         directory_path: str = "", 
         extensions: Optional[List[str]] = None
-    ) -> List[FileInfo]:
+    ) -> Optional[List[FileInfo]]:
         """
         Get files that have been uploaded since the given timestamp.
         
         Args:
-            timestamp: Only return files newer than this timestamp
+            timestamp: Unix timestamp, only files uploaded after it are returned
             directory_path: Path to search for files
             extensions: List of file extensions to filter by
             
         Returns:
-            List of FileInfo objects for new files
+            List of FileInfo objects for new files, or None if the listing failed
         """
         pass
+    
+    def close(self):
+        """Release any connections held by the provider."""
+        pass
 
 
 class DestinationProvider(ABC):
@@ -108,6 +124,27 @@ class DestinationProvider(ABC):
         """
         pass
     
+    @abstractmethod
+    def upload_media_stream(self, 
+        fileobj: BinaryIO, 
+        filename: str, 
+        name: Optional[str] = None, 
+        tags: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Upload media read from a binary stream to the destination.
+        
+        Args:
+            fileobj: Readable binary stream with the media content
+            filename: File name to report for the upload
+            name: Custom name for the media
+            tags: Tags to associate with the media
+            
+        Returns:
+            Media information dict if successful, None otherwise
+        """
+        pass
+    
     @abstractmethod
     def set_display_content(self, 
         media_id: str, 
@@ -136,6 +173,10 @@ class DestinationProvider(ABC):
             List of display information dictionaries
         """
         pass
+    
+    def close(self):
+        """Release any connections held by the provider."""
+        pass
 
 
 class MediaProcessor(ABC):
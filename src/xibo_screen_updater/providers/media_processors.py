@@ -6,8 +6,9 @@ such as converting PDFs to images for better compatibility.
 """
 
 import os
+import shutil
 import logging
-from typing import List
+from typing import Dict, List
 from abc import ABC, abstractmethod
 
 from .base import MediaProcessor, registry
@@ -22,10 +23,13 @@ class PassThroughProcessor(MediaProcessor):
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
+        # Output directory created by the last call, skipped on the next
+        self._output_dir = None
     
     def can_process(self, file_path: str) -> bool:
         """Can process any file by passing it through unchanged."""
-        return os.path.exists(file_path)
+        # A missing file is reported by process, saving a stat per file here
+        return True
     
     def process(self, input_path: str, output_path: str) -> bool:
         """Copy input file to output location without modification."""
@@ -34,15 +38,24 @@ class PassThroughProcessor(MediaProcessor):
                 return True  # No processing needed
             
             # Create output directory if needed
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            output_dir = os.path.dirname(output_path)
+            if output_dir and output_dir != self._output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+                self._output_dir = output_dir
             
-            # Copy file
-            import shutil
-            shutil.copy2(input_path, output_path)
+            # Contents only; copyfile uses os.sendfile where the platform has it
+            # and uploads don't need the mode and timestamps copy2 preserves
+            shutil.copyfile(input_path, output_path)
             
-            self.logger.debug(f"Pass-through processed: {input_path} -> {output_path}")
+            self.logger.debug("Pass-through processed: %s -> %s", input_path, output_path)
             return True
             
+        except FileNotFoundError as e:
+            # Either the input is missing or the output directory was removed;
+            # recreate the directory next time in case it was the latter
+            self._output_dir = None
+            self.logger.error("File not found in pass-through processing: %s", e.filename or e)
+            return False
         except Exception as e:
             self.logger.error(f"Error in pass-through processing: {e}")
             return False
@@ -66,16 +79,9 @@ class PDFToImageProcessor(MediaProcessor):
     
     def _check_dependencies(self):
         """Check if required dependencies are available."""
-        try:
-            # Try to import required libraries
-            # import pdf2image  # Would need: pip install pdf2image
-            # import PIL        # Would need: pip install Pillow
-            self._dependencies_available = False  # Set to False until dependencies are installed
-            if not self._dependencies_available:
-                self.logger.warning("PDF processing dependencies not available. Install pdf2image and Pillow to enable PDF conversion.")
-        except ImportError:
-            self._dependencies_available = False
-            self.logger.warning("PDF processing dependencies not available.")
+        # Stays False until conversion is implemented with pdf2image and Pillow
+        self._dependencies_available = False
+        self.logger.warning("PDF processing dependencies not available. Install pdf2image and Pillow to enable PDF conversion.")
     
     def can_process(self, file_path: str) -> bool:
         """Can process PDF files if dependencies are available."""
@@ -126,10 +132,31 @@ class MediaProcessorChain:
     def __init__(self):
         self.processors = []
         self.logger = logging.getLogger(__name__)
+        # Candidate processors per lowercase extension, in chain order
+        self._ext_index: Dict[str, List[MediaProcessor]] = {}
+        self._wildcards: List[MediaProcessor] = []
     
     def add_processor(self, processor: MediaProcessor):
         """Add a processor to the chain."""
         self.processors.append(processor)
+        
+        extensions = {ext.lower() for ext in processor.get_supported_extensions()}
+        if '*' in extensions:
+            # Candidate for every extension, after the processors added before it
+            for candidates in self._ext_index.values():
+                candidates.append(processor)
+            self._wildcards.append(processor)
+            return
+        
+        for ext in extensions:
+            if ext not in self._ext_index:
+                self._ext_index[ext] = list(self._wildcards)
+            self._ext_index[ext].append(processor)
+    
+    def _candidates(self, file_path: str) -> List[MediaProcessor]:
+        """Get the processors declaring support for the file's extension, in chain order."""
+        ext = os.path.splitext(file_path)[1].lower()
+        return self._ext_index.get(ext, self._wildcards)
     
     def process_file(self, input_path: str, output_path: str) -> bool:
         """
@@ -142,7 +169,7 @@ class MediaProcessorChain:
         Returns:
             True if processing successful, False otherwise
         """
-        for processor in self.processors:
+        for processor in self._candidates(input_path):
             if processor.can_process(input_path):
                 self.logger.debug(f"Processing {input_path} with {processor.__class__.__name__}")
                 return processor.process(input_path, output_path)
@@ -152,7 +179,7 @@ class MediaProcessorChain:
     
     def get_processor_for_file(self, file_path: str) -> MediaProcessor:
         """Get the first processor that can handle the given file."""
-        for processor in self.processors:
+        for processor in self._candidates(file_path):
             if processor.can_process(file_path):
                 return processor
         return None
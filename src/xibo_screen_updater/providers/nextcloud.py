@@ -5,19 +5,98 @@ This module implements the SourceProvider interface for NextCloud,
 using WebDAV protocol for file operations.
 """
 
+import io
 import requests
-import xml.etree.ElementTree as ET
+import urllib3
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 from urllib.parse import urljoin, unquote
+import calendar
+import email.utils
 import os
+import random
+import shutil
 import time
-from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import BinaryIO, ContextManager, Iterator, List, Dict, Any, Optional, Set, Tuple, Union
 import logging
 
 from .base import SourceProvider, registry
 from ..types.file_info import FileInfo
 
+# lxml parses PROPFIND responses in C; the stdlib parser is used when it is not installed
+try:
+    from lxml import etree as ET
+    LXML_AVAILABLE = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    LXML_AVAILABLE = False
+
+
+# Chunk size used when copying downloads to disk
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Tags and paths in WebDAV PROPFIND responses, in Clark notation so that
+# lookups skip namespace prefix resolution
+DAV_RESPONSE_TAG = '{DAV:}response'
+DAV_HREF = '{DAV:}href'
+DAV_PROP = '{DAV:}propstat/{DAV:}prop'
+DAV_PROP_ETAG = '{DAV:}propstat/{DAV:}prop/{DAV:}getetag'
+DAV_ETAG = '{DAV:}getetag'
+DAV_CONTENT_LENGTH = '{DAV:}getcontentlength'
+DAV_CONTENT_TYPE = '{DAV:}getcontenttype'
+DAV_LAST_MODIFIED = '{DAV:}getlastmodified'
+NC_UPLOAD_TIME = '{http://nextcloud.org/ns}upload_time'
+
+# Listing PROPFIND body, asking only for the properties _extract_file_info reads
+LISTING_PROPFIND_BODY = b'''<?xml version="1.0"?>
+<d:propfind xmlns:d="DAV:" xmlns:nc="http://nextcloud.org/ns">
+    <d:prop>
+        <d:getlastmodified/>
+        <d:getcontentlength/>
+        <d:getetag/>
+        <d:getcontenttype/>
+        <nc:upload_time/>
+    </d:prop>
+</d:propfind>'''
+
+# Depth 0 PROPFIND body asking for a collection's etag only
+ETAG_PROPFIND_BODY = b'''<?xml version="1.0"?>
+<d:propfind xmlns:d="DAV:">
+    <d:prop>
+        <d:getetag/>
+    </d:prop>
+</d:propfind>'''
+
+# Retries for idempotent requests hitting connection errors or a busy server
+HTTP_RETRIES = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({'GET', 'HEAD', 'PROPFIND'}),
+    raise_on_status=False
+)
+
+# Attempts at a download that fails part way through the body, which the
+# session's Retry cannot replay
+DOWNLOAD_ATTEMPTS = 3
+
+# Activities requested per call to the Activity app's OCS API
+ACTIVITY_PAGE_SIZE = 200
+
+# Naive UTC origin for turning Unix timestamps into FileInfo.upload_date
+UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def extension_suffixes(extensions: Optional[List[str]]) -> Optional[Tuple[str, ...]]:
+    """Lowercase an extension filter once into a tuple for a single str.endswith call."""
+    if not extensions:
+        return None
+    return tuple(ext.lower() for ext in extensions)
+
 
 class NextCloudProvider(SourceProvider):
     """
@@ -37,8 +116,29 @@ class NextCloudProvider(SourceProvider):
         self.username = username
         self.password = password
         self.auth = HTTPBasicAuth(username, password)
+        # Listing hrefs start with this, the rest is the path FileInfo exposes
+        self._href_prefix = f'/remote.php/dav/files/{username}/'
+        self._webdav_prefix = self.server_url + self._href_prefix
+        
+        # One pooled keep-alive session for every request to this server
+        self.session = requests.Session()
+        self.session.auth = self.auth
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=16, pool_block=False, max_retries=HTTP_RETRIES
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
         self.logger = logging.getLogger(__name__)
         self._connected = False
+        # Cleared when the server has no Activity app, see get_activity_since
+        self.activity_feed_available = True
+        # Last listing per directory: (collection etag, extension filter, files)
+        self._listing_cache: Dict[str, Tuple[str, Optional[Tuple[str, ...]], List[FileInfo]]] = {}
+        # ETag of the last download per local path: (remote path, etag)
+        self._download_etags: Dict[str, Tuple[str, str]] = {}
+        # Local directories already created for downloads
+        self._local_dirs: Set[str] = set()
         
     def connect(self) -> bool:
         """
@@ -48,9 +148,10 @@ class NextCloudProvider(SourceProvider):
             True if connection successful
         """
         try:
-            # Test connection with a simple request
+            # Test connection with a Depth 0 request, which only describes the
+            # root collection instead of listing the whole account
             url = self._get_webdav_url("")
-            response = requests.request('PROPFIND', url, auth=self.auth, timeout=10)
+            response = self.session.request('PROPFIND', url, headers={'Depth': '0'}, timeout=10)
             self._connected = response.status_code in [200, 207]  # 207 is Multi-Status for WebDAV
             
             if self._connected:
@@ -65,6 +166,10 @@ class NextCloudProvider(SourceProvider):
             self._connected = False
             return False
         
+    def close(self):
+        """Close the pooled HTTP session."""
+        self.session.close()
+    
     def _get_webdav_url(self, path: str = "") -> str:
         """
         Construct WebDAV URL for the given path.
@@ -75,8 +180,7 @@ class NextCloudProvider(SourceProvider):
         Returns:
             Complete WebDAV URL
         """
-        path = path.strip('/')
-        return f"{self.server_url}/remote.php/dav/files/{self.username}/{path}"
+        return self._webdav_prefix + path.strip('/')
     
     def get_files(self, 
         directory_path: str = "", 
@@ -90,119 +194,283 @@ class NextCloudProvider(SourceProvider):
             extensions: List of file extensions to filter by
             
         Returns:
-            List of FileInfo objects
+            List of FileInfo objects, empty if the listing failed
+        """
+        files = self._list_files(directory_path, extensions)
+        return files if files is not None else []
+    
+    def _list_files(self, 
+        directory_path: str, 
+        extensions: Optional[List[str]]
+    ) -> Optional[List[FileInfo]]:
+        """
+        List a NextCloud directory, reusing the last listing while its etag is unchanged.
+        
+        Args:
+            directory_path: Path to the directory to list
+            extensions: List of file extensions to filter by
+            
+        Returns:
+            List of FileInfo objects, or None if the listing failed
         """
         if not self._connected and not self.connect():
-            return []
+            return None
             
         url = self._get_webdav_url(directory_path)
+        ext_tuple = extension_suffixes(extensions)
+        
+        # Check the collection etag with a cheap Depth 0 request before
+        # asking for the full listing
+        cached = self._listing_cache.get(directory_path)
+        if cached and cached[1] == ext_tuple and self._is_collection_unchanged(url, cached[0]):
+            self.logger.debug(f"Directory unchanged, reusing listing: {directory_path}")
+            return list(cached[2])
+        
+        try:
+            response = self._request_listing(url)
+            try:
+                collection_etag, files = self._parse_propfind_response(response.raw, ext_tuple)
+            finally:
+                response.close()
+            
+            if collection_etag:
+                self._listing_cache[directory_path] = (collection_etag, ext_tuple, files)
+            else:
+                self._listing_cache.pop(directory_path, None)
+            return list(files)
+            
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError, ET.ParseError) as e:
+            self.logger.error(f"Error listing files: {e}")
+            return None
+    
+    def iter_files(self, 
+        directory_path: str = "", 
+        extensions: Optional[List[str]] = None
+    ) -> Iterator[FileInfo]:
+        """
+        Iterate over files in a NextCloud directory as the listing arrives.
+        
+        Unlike get_files, entries are parsed one at a time from the streamed
+        response and the listing is not cached.
+        
+        Args:
+            directory_path: Path to the directory to list
+            extensions: List of file extensions to filter by
+            
+        Yields:
+            FileInfo objects for matching files
+        """
+        if not self._connected and not self.connect():
+            return
         
-        # WebDAV PROPFIND request to list directory contents
+        ext_tuple = extension_suffixes(extensions)
+        
+        try:
+            response = self._request_listing(self._get_webdav_url(directory_path))
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error listing files: {e}")
+            return
+        
+        try:
+            for _, file_info in self._iter_propfind(response.raw, ext_tuple):
+                if file_info is not None:
+                    yield file_info
+        except (ET.ParseError, urllib3.exceptions.HTTPError) as e:
+            self.logger.error(f"Error reading file listing: {e}")
+        finally:
+            response.close()
+    
+    def _request_listing(self, url: str) -> requests.Response:
+        """
+        Send a Depth 1 PROPFIND for a directory without reading the body.
+        
+        Args:
+            url: WebDAV URL of the directory
+            
+        Returns:
+            Streaming response whose raw body yields the decoded multistatus XML
+        """
         headers = {
             'Depth': '1',
-            'Content-Type': 'application/xml'
+            'Content-Type': 'application/xml',
+            # Leave out propstats for properties a file does not have
+            'Brief': 't',
+            'Prefer': 'return=minimal'
         }
         
-        # PROPFIND body to get file properties including upload time
-        propfind_body = '''<?xml version="1.0"?>
-        <d:propfind xmlns:d="DAV:" xmlns:nc="http://nextcloud.org/ns">
-            <d:prop>
-                <d:getlastmodified/>
-                <d:getcontentlength/>
-                <d:resourcetype/>
-                <d:getetag/>
-                <d:getcontenttype/>
-                <d:creationdate/>
-                <nc:creation_time/>
-                <nc:upload_time/>
-            </d:prop>
-        </d:propfind>'''
+        response = self.session.request(
+            'PROPFIND',
+            url,
+            headers=headers,
+            data=LISTING_PROPFIND_BODY,
+            timeout=30,
+            stream=True
+        )
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            response.close()
+            raise
+        
+        response.raw.decode_content = True
+        return response
+    
+    def _is_collection_unchanged(self, url: str, etag: str) -> bool:
+        """
+        Check whether a collection still has the given etag.
         
+        Sends a Depth 0 PROPFIND for the etag only, with If-None-Match so
+        servers that honour it can answer without a body.
+        
+        Args:
+            url: WebDAV URL of the collection
+            etag: Etag recorded with the cached listing
+            
+        Returns:
+            True if the collection is known to be unchanged, False otherwise
+        """
+        headers = {
+            'Depth': '0',
+            'Content-Type': 'application/xml',
+            'If-None-Match': f'"{etag}"'
+        }
         try:
-            response = requests.request(
+            response = self.session.request(
                 'PROPFIND',
                 url,
-                auth=self.auth,
                 headers=headers,
-                data=propfind_body,
+                data=ETAG_PROPFIND_BODY,
                 timeout=30
             )
-            response.raise_for_status()
-            
-            return self._parse_propfind_response(response.text, extensions)
-            
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Error listing files: {e}")
-            return []
+            self.logger.debug(f"Etag check failed, listing directory: {e}")
+            return False
+        
+        # Sabre answers a matching If-None-Match on PROPFIND with 412
+        if response.status_code in (304, 412):
+            return True
+        if response.status_code != 207:
+            return False
+        
+        try:
+            current_etag, _ = self._parse_propfind_response(response.text)
+        except ET.ParseError as e:
+            self.logger.debug(f"Unreadable etag response, listing directory: {e}")
+            return False
+        return current_etag == etag
     
     def _parse_propfind_response(self, 
-        xml_content: str, 
+        xml_content: Union[str, bytes, BinaryIO], 
         extensions: Optional[List[str]] = None
-    ) -> List[FileInfo]:
+    ) -> Tuple[Optional[str], List[FileInfo]]:
         """
         Parse WebDAV PROPFIND XML response to extract file information.
         
         Args:
-            xml_content: XML response content
+            xml_content: XML response content, or a binary stream to read it from
             extensions: List of file extensions to filter by
             
         Returns:
-            List of FileInfo objects
+            Tuple of the listed collection's etag (if present) and FileInfo objects
+            
+        Raises:
+            ET.ParseError: If the response is not well-formed XML
         """
         files = []
+        collection_etag = None
+        ext_tuple = extension_suffixes(extensions)
         
-        try:
-            root = ET.fromstring(xml_content)
-            
-            # Define namespaces
-            namespaces = {
-                'd': 'DAV:',
-                's': 'http://sabredav.org/ns',
-                'oc': 'http://owncloud.org/ns',
-                'nc': 'http://nextcloud.org/ns'
-            }
+        if isinstance(xml_content, str):
+            xml_content = xml_content.encode()
+        source = io.BytesIO(xml_content) if isinstance(xml_content, bytes) else xml_content
+        
+        for etag, file_info in self._iter_propfind(source, ext_tuple):
+            if file_info is not None:
+                files.append(file_info)
+            elif collection_etag is None:
+                # Remember the etag of the listed collection
+                collection_etag = etag
+        
+        return collection_etag, files
+    
+    def _iter_propfind(self, 
+        source: BinaryIO, 
+        ext_tuple: Optional[Tuple[str, ...]] = None
+    ) -> Iterator[Tuple[Optional[str], Optional[FileInfo]]]:
+        """
+        Parse a PROPFIND multistatus body incrementally.
+        
+        Each d:response element is cleared once handled, so memory does not
+        grow with the size of the directory.
+        
+        Args:
+            source: Binary stream with the XML response
+            ext_tuple: Lowercased file extensions to filter by
             
-            # Find all response elements
-            for response in root.findall('.//d:response', namespaces):
-                href_elem = response.find('d:href', namespaces)
-                if href_elem is None:
-                    continue
-                    
-                href = href_elem.text
-                filename = unquote(href.split('/')[-1])
-                
-                # Skip directories and parent directory
-                if href.endswith('/') or not filename:
-                    continue
-                
-                # Check file extension
-                if extensions:
-                    if not any(filename.lower().endswith(ext.lower()) for ext in extensions):
-                        continue
-                
-                # Extract file properties
-                propstat = response.find('d:propstat', namespaces)
-                if propstat is None:
-                    continue
-                    
-                prop = propstat.find('d:prop', namespaces)
-                if prop is None:
-                    continue
-                
-                # Create FileInfo object
-                file_info = self._extract_file_info(prop, namespaces, filename, href)
-                if file_info:
-                    files.append(file_info)
-                    
-        except ET.ParseError as e:
-            self.logger.error(f"Error parsing XML response: {e}")
-            return []
+        Yields:
+            (etag, None) for collections and (None, file_info) for matching files
+        """
+        if LXML_AVAILABLE:
+            # Skip whitespace-only text and the ID table, neither of which is
+            # read, and never expand entities from the server
+            events = ET.iterparse(
+                source,
+                events=('end',),
+                tag=DAV_RESPONSE_TAG,
+                remove_blank_text=True,
+                collect_ids=False,
+                resolve_entities=False
+            )
+        else:
+            events = ET.iterparse(source, events=('end',))
         
-        return files
+        for _, elem in events:
+            if elem.tag != DAV_RESPONSE_TAG:
+                continue
+            try:
+                entry = self._parse_response_element(elem, ext_tuple)
+            finally:
+                elem.clear()
+                if LXML_AVAILABLE:
+                    # Also detach cleared responses from the multistatus root
+                    while elem.getprevious() is not None:
+                        del elem.getparent()[0]
+            if entry is not None:
+                yield entry
+    
+    def _parse_response_element(self, 
+        response, 
+        ext_tuple: Optional[Tuple[str, ...]] = None
+    ) -> Optional[Tuple[Optional[str], Optional[FileInfo]]]:
+        """Parse a single d:response element of a PROPFIND response."""
+        href_elem = response.find(DAV_HREF)
+        if href_elem is None:
+            return None
+        
+        href = href_elem.text
+        filename = unquote(href.split('/')[-1])
+        
+        # Directories only contribute their etag
+        if href.endswith('/') or not filename:
+            etag_elem = response.find(DAV_PROP_ETAG)
+            if etag_elem is not None and etag_elem.text:
+                return etag_elem.text.strip('"'), None
+            return None, None
+        
+        # Check file extension
+        if ext_tuple and not filename.lower().endswith(ext_tuple):
+            return None
+        
+        # Extract file properties
+        prop = response.find(DAV_PROP)
+        if prop is None:
+            return None
+        
+        file_info = self._extract_file_info(prop, filename, href)
+        return (None, file_info) if file_info else None
     
     def _extract_file_info(self, 
         prop, 
-        namespaces: Dict[str, str], 
         filename: str, 
         href: str
     ) -> Optional[FileInfo]:
@@ -210,50 +478,53 @@ class NextCloudProvider(SourceProvider):
         try:
             # Get file size
             size = 0
-            size_elem = prop.find('d:getcontentlength', namespaces)
+            size_elem = prop.find(DAV_CONTENT_LENGTH)
             if size_elem is not None:
                 size = int(size_elem.text)
             
-            # Get upload date (prefer upload_time, fallback to last_modified)
-            upload_date = datetime.utcnow()
+            # Get upload time (prefer upload_time, fallback to last_modified)
+            upload_ts = None
             
             # Try NextCloud's upload_time first
-            upload_time_elem = prop.find('nc:upload_time', namespaces)
+            upload_time_elem = prop.find(NC_UPLOAD_TIME)
             if upload_time_elem is not None:
                 try:
-                    timestamp = int(upload_time_elem.text)
-                    upload_date = datetime.fromtimestamp(timestamp, tz=timezone.utc).replace(tzinfo=None)
+                    upload_ts = int(upload_time_elem.text)
                 except (ValueError, TypeError):
                     pass
             else:
                 # Fallback to last modified
-                lastmod_elem = prop.find('d:getlastmodified', namespaces)
-                if lastmod_elem is not None:
-                    try:
-                        dt = datetime.strptime(lastmod_elem.text, '%a, %d %b %Y %H:%M:%S %Z')
-                        upload_date = dt.replace(tzinfo=timezone.utc).replace(tzinfo=None)
-                    except ValueError:
-                        pass
+                lastmod_elem = prop.find(DAV_LAST_MODIFIED)
+                if lastmod_elem is not None and lastmod_elem.text:
+                    # RFC 1123 date, normally GMT but honour any numeric offset
+                    parsed = email.utils.parsedate_tz(lastmod_elem.text)
+                    if parsed is not None:
+                        upload_ts = calendar.timegm(parsed[:9]) - (parsed[9] or 0)
+            
+            if upload_ts is None:
+                upload_ts = int(time.time())
+            upload_date = UNIX_EPOCH + timedelta(seconds=upload_ts)
             
             # Get content type
             content_type = None
-            type_elem = prop.find('d:getcontenttype', namespaces)
+            type_elem = prop.find(DAV_CONTENT_TYPE)
             if type_elem is not None:
                 content_type = type_elem.text
             
             # Get etag
             etag = None
-            etag_elem = prop.find('d:getetag', namespaces)
+            etag_elem = prop.find(DAV_ETAG)
             if etag_elem is not None:
                 etag = etag_elem.text.strip('"')
             
             return FileInfo(
                 name=filename,
-                path=href.replace(f'/remote.php/dav/files/{self.username}/', ''),
+                path=href[len(self._href_prefix):] if href.startswith(self._href_prefix) else href,
                 size=size,
                 upload_date=upload_date,
                 content_type=content_type,
-                etag=etag
+                etag=etag,
+                upload_ts=upload_ts
             )
             
         except Exception as e:
@@ -264,6 +535,9 @@ class NextCloudProvider(SourceProvider):
         """
         Download a file from NextCloud.
         
+        A local copy left by an earlier download of the same file is kept
+        when the server reports it unchanged.
+        
         Args:
             file_path: Path to the file on NextCloud
             local_path: Local path to save the file
@@ -276,55 +550,263 @@ class NextCloudProvider(SourceProvider):
             
         url = self._get_webdav_url(file_path)
         
-        try:
-            response = requests.get(url, auth=self.auth, stream=True, timeout=60)
+        headers = {}
+        cached = self._download_etags.get(local_path)
+        if cached and cached[0] == file_path and os.path.exists(local_path):
+            headers['If-None-Match'] = cached[1]
+        
+        for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+            try:
+                return self._download_to(url, file_path, local_path, headers)
+                
+            except requests.exceptions.HTTPError as e:
+                if e.response.status_code in [401, 403]:
+                    self.logger.error(f"Authentication failed for {file_path}: {e}")
+                elif e.response.status_code == 404:
+                    self.logger.error(f"File not found: {file_path}")
+                else:
+                    self.logger.error(f"HTTP error downloading {file_path}: {e}")
+                return None
+                
+            except (requests.exceptions.ConnectionError, 
+                    requests.exceptions.Timeout, 
+                    urllib3.exceptions.HTTPError) as e:
+                if attempt == DOWNLOAD_ATTEMPTS:
+                    self.logger.error(f"Network error downloading {file_path}: {e}")
+                    return None
+                # Jittered exponential backoff so clients do not reconnect in step
+                delay = min(60, 2 ** attempt + random.random())
+                self.logger.warning(
+                    f"Download of {file_path} interrupted ({e}), retrying in {delay:.1f}s"
+                )
+                time.sleep(delay)
+                
+            # Before OSError, which requests exceptions also derive from
+            except requests.exceptions.RequestException as e:
+                self.logger.error(f"Network error downloading {file_path}: {e}")
+                return None
+                
+            except (OSError, IOError) as e:
+                # The directory may have been removed, create it again next time
+                self._local_dirs.discard(os.path.dirname(local_path) or '.')
+                self.logger.error(f"Local file system error saving {local_path}: {e}")
+                return None
+        
+        return None
+    
+    def _download_to(self, 
+        url: str, 
+        file_path: str, 
+        local_path: str, 
+        headers: Dict[str, str]
+    ) -> str:
+        """Make a single download attempt, raising on any failure."""
+        with self.session.get(url, headers=headers, stream=True, timeout=(5, 60)) as response:
+            if response.status_code == 304:
+                self.logger.debug(f"Unchanged, keeping local copy: {local_path}")
+                return local_path
             response.raise_for_status()
             
-            # Create directory if it doesn't exist
-            os.makedirs(os.path.dirname(local_path) if os.path.dirname(local_path) else '.', exist_ok=True)
+            self._ensure_dir(os.path.dirname(local_path) or '.')
             
+            # Copy the body straight to disk in large chunks
+            response.raw.decode_content = True
             with open(local_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+                self._preallocate(f, response.headers.get('Content-Length'))
+                shutil.copyfileobj(response.raw, f, DOWNLOAD_CHUNK_SIZE)
+                # The decoded body may be shorter than the advertised length
+                f.truncate()
             
-            self.logger.info(f"Downloaded: {file_path} -> {local_path}")
-            return local_path
-            
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code in [401, 403]:
-                self.logger.error(f"Authentication failed for {file_path}: {e}")
-            elif e.response.status_code == 404:
-                self.logger.error(f"File not found: {file_path}")
+            etag = response.headers.get('ETag')
+            if etag:
+                self._download_etags[local_path] = (file_path, etag)
             else:
-                self.logger.error(f"HTTP error downloading {file_path}: {e}")
-            return None
+                self._download_etags.pop(local_path, None)
+        
+        self.logger.info(f"Downloaded: {file_path} -> {local_path}")
+        return local_path
+    
+    def _ensure_dir(self, directory: str):
+        """Create a download directory unless this provider already did."""
+        if directory not in self._local_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._local_dirs.add(directory)
+    
+    @staticmethod
+    def _preallocate(f: BinaryIO, content_length: Optional[str]):
+        """Reserve disk space for a download of known size, where the platform supports it."""
+        if not content_length or not hasattr(os, 'posix_fallocate'):
+            return
+        try:
+            size = int(content_length)
+            if size > 0:
+                os.posix_fallocate(f.fileno(), 0, size)
+        except (ValueError, OSError):
+            pass  # Not supported by this filesystem, the copy still works
+    
+    def download_files(self, 
+        files: Dict[str, str], 
+        max_workers: int = 8
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Download several files at once over the pooled session.
+        
+        A failed file does not stop the others.
+        
+        Args:
+            files: Mapping of NextCloud paths to local paths to save them to
+            max_workers: Maximum number of concurrent downloads
             
-        except (OSError, IOError) as e:
-            self.logger.error(f"Local file system error saving {local_path}: {e}")
+        Returns:
+            Tuple of local paths downloaded and NextCloud paths that failed
+        """
+        if not files:
+            return [], []
+        if not self._connected and not self.connect():
+            return [], list(files)
+        
+        # Create each target directory once, before the workers race for it
+        try:
+            for directory in {os.path.dirname(local_path) or '.' for local_path in files.values()}:
+                self._ensure_dir(directory)
+        except OSError as e:
+            self.logger.error(f"Cannot create download directory: {e}")
+            return [], list(files)
+        
+        downloaded, failed = [], []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(files)))) as pool:
+            futures = {
+                pool.submit(self.download_file, file_path, local_path): file_path
+                for file_path, local_path in files.items()
+            }
+            for future in as_completed(futures):
+                local_path = future.result()
+                if local_path:
+                    downloaded.append(local_path)
+                else:
+                    failed.append(futures[future])
+        
+        return downloaded, failed
+    
+    def open_stream(self, file_path: str) -> Optional[ContextManager[BinaryIO]]:
+        """
+        Open a streaming download of a file from NextCloud.
+        
+        The response body is not read until the returned stream is consumed,
+        so it can be handed directly to an upload without touching disk.
+        
+        Args:
+            file_path: Path to the file on NextCloud
+            
+        Returns:
+            Context manager yielding the decoded response stream, None on failure
+        """
+        if not self._connected and not self.connect():
             return None
+        
+        url = self._get_webdav_url(file_path)
+        
+        try:
+            response = self.session.get(url, stream=True, timeout=(5, 60))
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            self.logger.error(f"Error opening stream for {file_path}: {e}")
+            return None
+        
+        response.raw.decode_content = True
+        return self._stream_response(response)
+    
+    @staticmethod
+    @contextmanager
+    def _stream_response(response: requests.Response) -> ContextManager[BinaryIO]:
+        """Yield the raw body of a streaming response, closing it afterwards."""
+        try:
+            yield response.raw
+        finally:
+            response.close()
+    
+    def get_activity_since(self, 
+        activity_id: Optional[int]
+    ) -> Optional[Tuple[int, Optional[List[str]]]]:
+        """
+        Get paths of files changed after an activity, using the Activity app.
+        
+        Without an activity_id only the newest activity id is fetched, to be
+        used as the starting point for later calls.
+        
+        Args:
+            activity_id: Last activity id already handled, if any
             
+        Returns:
+            Tuple of the newest activity id and the changed paths (None when
+            there were more changes than fit in one page), or None if the
+            activity feed is unavailable
+        """
+        if not self.activity_feed_available:
+            return None
+        
+        url = f"{self.server_url}/ocs/v2.php/apps/activity/api/v2/activity/files"
+        headers = {'OCS-APIRequest': 'true', 'Accept': 'application/json'}
+        if activity_id is None:
+            params = {'format': 'json', 'limit': 1}
+        else:
+            params = {'format': 'json', 'limit': ACTIVITY_PAGE_SIZE, 'since': activity_id, 'sort': 'asc'}
+        
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=30)
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Network error downloading {file_path}: {e}")
+            self.logger.debug(f"Error reading activity feed: {e}")
+            return None
+        
+        # The Activity app answers 304 when nothing happened after 'since'
+        if response.status_code == 304:
+            return activity_id, []
+        if response.status_code == 404:
+            self.logger.info("NextCloud Activity app not available, listing directories every cycle")
+            self.activity_feed_available = False
             return None
+        if response.status_code != 200:
+            return None
+        
+        try:
+            activities = response.json()['ocs']['data']
+        except (ValueError, KeyError, TypeError):
+            return None
+        
+        latest_id = activity_id or 0
+        paths = []
+        for activity in activities:
+            latest_id = max(latest_id, int(activity.get('activity_id', 0)))
+            objects = activity.get('objects')
+            if isinstance(objects, dict):
+                paths.extend(objects.values())
+            elif activity.get('object_name'):
+                paths.append(activity['object_name'])
+        
+        if activity_id is not None and len(activities) >= ACTIVITY_PAGE_SIZE:
+            return latest_id, None
+        return latest_id, paths
     
     def get_new_files_since(self, 
-        timestamp: datetime, 
+        timestamp: int, 
         directory_path: str = "", 
         extensions: Optional[List[str]] = None
-    ) -> List[FileInfo]:
+    ) -> Optional[List[FileInfo]]:
         """
         Get files uploaded since the given timestamp.
         
         Args:
-            timestamp: Only return files newer than this timestamp
+            timestamp: Unix timestamp, only files uploaded after it are returned
             directory_path: Path to search for files
             extensions: List of file extensions to filter by
             
         Returns:
-            List of FileInfo objects for new files
+            List of FileInfo objects for new files, or None if the listing failed
         """
-        all_files = self.get_files(directory_path, extensions)
-        new_files = [f for f in all_files if f.upload_date > timestamp]
+        all_files = self._list_files(directory_path, extensions)
+        if all_files is None:
+            return None
+        new_files = [f for f in all_files if f.upload_ts > timestamp]
         
         if new_files:
             self.logger.info(f"Found {len(new_files)} new files since {timestamp}")
@@ -6,10 +6,16 @@ using OAuth2 authentication and REST API for media management.
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.filepost import choose_boundary
+from urllib3.util.retry import Retry
+import io
 import os
+import shutil
+import tempfile
 import time
 from urllib.parse import urljoin
-from typing import Optional, Dict, Any, List
+from typing import BinaryIO, Iterator, Optional, Dict, Any, List
 from datetime import datetime, timedelta
 import logging
 
@@ -19,6 +25,113 @@ from .base import DestinationProvider, registry
 auto_scheduled_prefix = "Auto-scheduled"
 auto_layout_prefix = "Auto-layout"
 
+# Minimum seconds between re-authentications triggered by a rejected token
+REAUTH_INTERVAL = 60
+
+# Retries for reads hitting connection errors or a busy CMS; uploads and
+# other writes are never replayed
+HTTP_RETRIES = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({'GET', 'HEAD'}),
+    raise_on_status=False
+)
+
+# Upload sources of unknown length are spooled to find their size; this
+# much stays in memory before spilling to disk
+UPLOAD_SPOOL_SIZE = 8 * 1024 * 1024
+UPLOAD_BLOCK_SIZE = 64 * 1024
+
+
+class MultipartStream:
+    """
+    Multipart form body that reads the file part while it is being sent.
+    
+    requests builds multipart bodies in memory, holding the whole media
+    file before the upload starts. This body has a known length, so it is
+    sent with a Content-Length header rather than chunked.
+    """
+    
+    def __init__(self, 
+        fields: Dict[str, str], 
+        file_field: str, 
+        filename: str, 
+        fileobj: BinaryIO, 
+        size: int, 
+        content_type: str = 'application/octet-stream'
+    ):
+        """
+        Build the body around a file stream.
+        
+        Args:
+            fields: Plain form fields sent before the file
+            file_field: Form field name of the file part
+            filename: File name reported in the file part
+            fileobj: Readable binary stream positioned at the file content
+            size: Number of bytes fileobj will yield
+            content_type: Content type of the file part
+        """
+        boundary = choose_boundary()
+        head = ''.join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{self._quote(key)}"\r\n\r\n{value}\r\n'
+            for key, value in fields.items()
+        )
+        head += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{self._quote(file_field)}"; '
+            f'filename="{self._quote(filename)}"\r\nContent-Type: {content_type}\r\n\r\n'
+        )
+        self._head = head.encode('utf-8')
+        self._tail = f'\r\n--{boundary}--\r\n'.encode('ascii')
+        self._fileobj = fileobj
+        try:
+            self._start = fileobj.tell() if getattr(fileobj, 'seekable', lambda: True)() else None
+        except (AttributeError, OSError, ValueError):
+            self._start = None
+        
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        # Read by requests to set Content-Length
+        self.len = len(self._head) + size + len(self._tail)
+        self._parts = [io.BytesIO(self._head), fileobj, io.BytesIO(self._tail)]
+    
+    @staticmethod
+    def _quote(value: str) -> str:
+        """Escape a header parameter value the way browsers do for form data."""
+        return value.replace('\\', '\\\\').replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+    
+    def seekable(self) -> bool:
+        """Whether the body can be rewound to be sent again."""
+        return self._start is not None
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Rewind to the start of the body; no other positions are supported."""
+        if offset != 0 or whence != io.SEEK_SET or self._start is None:
+            raise io.UnsupportedOperation("MultipartStream can only be rewound")
+        self._fileobj.seek(self._start)
+        self._parts = [io.BytesIO(self._head), self._fileobj, io.BytesIO(self._tail)]
+        return 0
+    
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes of the body, or all of what is left."""
+        chunks = []
+        while self._parts and size != 0:
+            data = self._parts[0].read(size)
+            if not data:
+                self._parts.pop(0)
+                continue
+            chunks.append(data)
+            if size > 0:
+                size -= len(data)
+        return b''.join(chunks)
+    
+    def __iter__(self) -> Iterator[bytes]:
+        while True:
+            block = self.read(UPLOAD_BLOCK_SIZE)
+            if not block:
+                return
+            yield block
+
+
 class XiboProvider(DestinationProvider):
     """
     Xibo CMS client implementing DestinationProvider interface.
@@ -45,11 +158,25 @@ class XiboProvider(DestinationProvider):
         self.debug = debug
         self.access_token = None
         self.token_expires_at = 0
+        # Monotonic time of the last re-authentication after a 401, None if never
+        self._last_reauth_at: Optional[float] = None
         self.logger = logging.getLogger(__name__)
         
+        # One pooled keep-alive session for every request to the CMS
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=16, pool_block=False, max_retries=HTTP_RETRIES
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
         if debug:
             self.logger.setLevel(logging.DEBUG)
         
+    def close(self):
+        """Close the pooled HTTP session."""
+        self.session.close()
+    
     def _log(self, message: str, level: str = 'info'):
         """Log messages with appropriate level."""
         if level == 'debug' and not self.debug:
@@ -95,7 +222,7 @@ class XiboProvider(DestinationProvider):
             self._log(f"Authenticating with Xibo server at {url}")
             self._log(f"Using client_id: {self.client_id[:8]}...", 'debug')
             
-            response = requests.post(url, data=data, headers=headers, timeout=30)
+            response = self.session.post(url, data=data, headers=headers, timeout=30)
             
             self._log(f"Response status: {response.status_code}", 'debug')
             
@@ -154,7 +281,15 @@ class XiboProvider(DestinationProvider):
         if self.debug and 'data' in kwargs:
             self._log(f"Data: {kwargs['data']}", 'debug')
         
-        response = requests.request(method, url, timeout=60, **kwargs)
+        response = self.session.request(method, url, timeout=60, **kwargs)
+        
+        # The CMS can revoke a token before it expires, e.g. after a restart
+        if response.status_code == 401 and self._can_retry_after_reauth(kwargs.get('files'), kwargs.get('data')):
+            self._log("Access token rejected, re-authenticating...")
+            self._last_reauth_at = time.monotonic()
+            if self.authenticate():
+                headers['Authorization'] = f'Bearer {self.access_token}'
+                response = self.session.request(method, url, timeout=60, **kwargs)
         
         if self.debug:
             self._log(f"Response status: {response.status_code}", 'debug')
@@ -167,6 +302,33 @@ class XiboProvider(DestinationProvider):
         response.raise_for_status()
         return response
     
+    def _can_retry_after_reauth(self, files: Optional[Dict[str, Any]], data: Any = None) -> bool:
+        """
+        Check whether a request rejected with 401 may be re-sent with a new token.
+        
+        Re-authentication after a 401 is limited to once per REAUTH_INTERVAL,
+        regardless of logins and token refreshes in between, and uploads are
+        only re-sent if their streams can be rewound.
+        
+        Args:
+            files: Multipart files of the rejected request, if any
+            data: Body of the rejected request, rewound if it is a stream
+            
+        Returns:
+            True if the request can be retried, False otherwise
+        """
+        if self._last_reauth_at is not None and time.monotonic() - self._last_reauth_at < REAUTH_INTERVAL:
+            return False
+        
+        streams = [value[1] if isinstance(value, tuple) else value for value in (files or {}).values()]
+        if hasattr(data, 'read'):
+            streams.append(data)
+        for fileobj in streams:
+            if not (hasattr(fileobj, 'seekable') and fileobj.seekable()):
+                return False
+            fileobj.seek(0)
+        return True
+    
     def upload_media(self, 
         file_path: str, 
         name: Optional[str] = None, 
@@ -187,21 +349,56 @@ class XiboProvider(DestinationProvider):
             self.logger.error(f"File not found: {file_path}")
             return None
         
-        filename = os.path.basename(file_path)
+        try:
+            with open(file_path, 'rb') as f:
+                return self.upload_media_stream(f, os.path.basename(file_path), name, tags)
+        except OSError as e:
+            self.logger.error(f"Error reading media {file_path}: {e}")
+            return None
+    
+    def upload_media_stream(self, 
+        fileobj: BinaryIO, 
+        filename: str, 
+        name: Optional[str] = None, 
+        tags: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Upload media read from a binary stream to the Xibo library.
+        
+        The stream is sent as it is read. Streams whose remaining length
+        cannot be determined are spooled to a temporary file first.
+        
+        Args:
+            fileobj: Readable binary stream with the media content
+            filename: File name reported to Xibo
+            name: Custom name for the media. Defaults to filename without extension
+            tags: Comma-separated tags for the media
+            
+        Returns:
+            Media information dict if successful, None otherwise
+        """
         media_name = name or os.path.splitext(filename)[0]
         
-        self._log(f"Uploading media file: {file_path} as '{media_name}'")
+        self._log(f"Uploading media file: {filename} as '{media_name}'")
         
+        spool = None
         try:
-            with open(file_path, 'rb') as f:
-                files = {'files': (filename, f, 'application/octet-stream')}
-                data = {'name': media_name}
-                
-                if tags:
-                    data['tags'] = tags
-                
-                response = self._make_request('POST', 'library', files=files, data=data)
-                
+            size = self._remaining_size(fileobj)
+            if size is None:
+                spool = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
+                shutil.copyfileobj(fileobj, spool, UPLOAD_BLOCK_SIZE)
+                size = spool.tell()
+                spool.seek(0)
+                fileobj = spool
+            
+            fields = {'name': media_name}
+            if tags:
+                fields['tags'] = tags
+            body = MultipartStream(fields, 'files', filename, fileobj, size)
+            
+            response = self._make_request(
+                'POST', 'library', data=body, headers={'Content-Type': body.content_type}
+            )
             result = response.json()
             
             # Handle different response formats
@@ -214,8 +411,31 @@ class XiboProvider(DestinationProvider):
                 return None
                 
         except Exception as e:
-            self.logger.error(f"Error uploading media {file_path}: {e}")
+            self.logger.error(f"Error uploading media {filename}: {e}")
             return None
+        finally:
+            if spool is not None:
+                spool.close()
+    
+    @staticmethod
+    def _remaining_size(fileobj: BinaryIO) -> Optional[int]:
+        """Get how many bytes are left in a stream, or None if it cannot tell."""
+        try:
+            if getattr(fileobj, 'seekable', lambda: True)():
+                position = fileobj.tell()
+                fileobj.seek(0, io.SEEK_END)
+                end = fileobj.tell()
+                fileobj.seek(position)
+                return end - position
+        except (AttributeError, OSError, ValueError):
+            pass
+        
+        # urllib3 responses know how much of a body without content coding is left
+        remaining = getattr(fileobj, 'length_remaining', None)
+        headers = getattr(fileobj, 'headers', None) or {}
+        if isinstance(remaining, int) and headers.get('Content-Encoding', 'identity') == 'identity':
+            return remaining
+        return None
     
     def set_display_content(self, 
         media_id: str, 
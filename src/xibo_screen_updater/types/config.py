@@ -1,3 +1,61 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+
 class ConfigurationError(Exception):
     """Raised when configuration is invalid or missing."""
     pass
+
+
+def _suffix(extension: str) -> str:
+    """Lowercase a configured extension and make sure it starts with a dot."""
+    extension = extension.lower()
+    return extension if extension.startswith('.') else '.' + extension
+
+
+@dataclass(frozen=True)
+class CopyFromConfig:
+    """Validated source (copy_from) settings with precomputed fields."""
+    provider: str
+    server: str
+    path: str
+    user: str
+    password: str
+    extensions: Tuple[str, ...]
+    poll_interval: int = 10
+    max_parallel_downloads: int = 4
+    
+    @classmethod
+    def from_dict(cls, section: Dict[str, Any]) -> 'CopyFromConfig':
+        """Build from a validated copy_from section."""
+        return cls(
+            provider=section['provider'],
+            server=section['server'],
+            path=section['path'],
+            user=section['auth']['user'],
+            password=section['auth']['password'],
+            extensions=tuple(_suffix(ext) for ext in section.get('extensions', [])),
+            poll_interval=section.get('poll_interval', 10),
+            max_parallel_downloads=max(1, int(section.get('max_parallel_downloads', 4)))
+        )
+
+
+@dataclass(frozen=True)
+class ProjectToConfig:
+    """Validated destination (project_to) settings with precomputed fields."""
+    provider: str
+    host: str
+    client_id: str
+    client_secret: str
+    display_name: str
+    
+    @classmethod
+    def from_dict(cls, section: Dict[str, Any]) -> 'ProjectToConfig':
+        """Build from a validated project_to section."""
+        return cls(
+            provider=section['provider'],
+            host=section['host'],
+            client_id=section['auth']['client_id'],
+            client_secret=section['auth']['client_secret'],
+            display_name=section['display']['name']
+        )
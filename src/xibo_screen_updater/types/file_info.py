@@ -1,9 +1,14 @@
+import calendar
+import sys
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
+# Slots drop the per-instance __dict__; dataclass only generates them on 3.10+
+DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class FileInfo:
     """Information about a file from a source provider."""
     name: str
@@ -12,6 +17,13 @@ class FileInfo:
     size: int
     content_type: Optional[str] = None
     etag: Optional[str] = None
+    # Unix timestamp of upload_date, used for the monitoring cursor comparisons
+    upload_ts: Optional[int] = None
+    
+    def __post_init__(self):
+        if self.upload_ts is None:
+            # Frozen, so bypass the generated __setattr__
+            object.__setattr__(self, 'upload_ts', calendar.timegm(self.upload_date.utctimetuple()))
     
     def __str__(self):
         return f"FileInfo(name='{self.name}', size={self.size}, upload_date={self.upload_date})"
@@ -7,15 +7,23 @@ initialize providers, and handle the basic workflow.
 
 import unittest
 import tempfile
+import contextlib
+import io
 import os
+import threading
+import urllib3
 import yaml
+from datetime import datetime
 from unittest.mock import Mock, patch
 
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
-from xibo_screen_updater.core.application import XiboScreenUpdater
+from xibo_screen_updater.core.application import XiboScreenUpdater, main
 from xibo_screen_updater.core.config_manager import ConfigurationError
+from xibo_screen_updater.core.logging_config import stop_logging
+from xibo_screen_updater.core.seen_files import SeenFileCache
+from xibo_screen_updater.types.file_info import FileInfo
 
 
 class TestXiboScreenUpdaterIntegration(unittest.TestCase):
@@ -23,6 +31,13 @@ class TestXiboScreenUpdaterIntegration(unittest.TestCase):
     
     def setUp(self):
         """Set up test fixtures."""
+        # Keep the default seen files database out of the real cache directory
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        env = patch.dict(os.environ, {'XDG_CACHE_HOME': cache_dir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        
         # Sample valid config
         self.valid_config = {
             'copy_from': {
@@ -73,6 +88,20 @@ class TestXiboScreenUpdaterIntegration(unittest.TestCase):
         finally:
             os.unlink(config_file)
     
+    def test_main_logs_errors_before_application_starts(self):
+        """Test that a failure resolving the config goes through the configured handlers."""
+        output = io.StringIO()
+        with patch.object(sys, 'argv', ['xibo-screen-updater']), \
+             patch('xibo_screen_updater.core.application.resolve_config_path',
+                   side_effect=ConfigurationError("no config file")), \
+             contextlib.redirect_stdout(output):
+            with self.assertRaises(SystemExit):
+                main()
+            stop_logging()  # Wait for the background writer
+        
+        self.assertIn("ERROR", output.getvalue())
+        self.assertIn("Configuration error: no config file", output.getvalue())
+    
     def test_application_initialization_with_invalid_config(self):
         """Test application behavior with invalid config."""
         invalid_config = {'invalid': 'config'}
@@ -153,6 +182,476 @@ class TestXiboScreenUpdaterIntegration(unittest.TestCase):
         finally:
             os.unlink(config_file)
 
+    
+    def test_process_file_streams_download_into_upload(self):
+        """Test that a file is streamed from NextCloud into the Xibo upload."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.display_name = 'Test Display'
+            app.nextcloud_provider = Mock()
+            app.xibo_provider = Mock()
+            
+            stream = io.BytesIO(b'image-bytes')
+            app.nextcloud_provider.open_stream.return_value = contextlib.nullcontext(stream)
+            app.xibo_provider.upload_media_stream.return_value = {'mediaId': 42}
+            app.xibo_provider.set_display_content.return_value = True
+            
+            file_info = FileInfo(
+                name='image.jpg', path='test-path/image.jpg', 
+                upload_date=datetime(2024, 1, 1), size=11
+            )
+            
+            self.assertTrue(app.process_file(file_info))
+            app.nextcloud_provider.open_stream.assert_called_once_with('test-path/image.jpg')
+            app.xibo_provider.upload_media_stream.assert_called_once_with(stream, 'image.jpg')
+            app.xibo_provider.set_display_content.assert_called_once_with('42', 'Test Display')
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_renamed_file_reuses_uploaded_media(self):
+        """Test that a file with an already uploaded etag is displayed without uploading."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.display_name = 'Test Display'
+            app.xibo_provider = Mock()
+            app.xibo_provider.upload_media_stream.return_value = {'mediaId': 42}
+            app.xibo_provider.set_display_content.return_value = True
+            
+            original, renamed = (
+                FileInfo(name=name, path=f'test-path/{name}', 
+                         upload_date=datetime(2024, 1, 1), size=1, etag='abc')
+                for name in ('photo.jpg', 'renamed.jpg')
+            )
+            
+            self.assertTrue(app.process_file(original, io.BytesIO(b'data')))
+            self.assertTrue(app.process_file(renamed, io.BytesIO(b'data')))
+            
+            app.xibo_provider.upload_media_stream.assert_called_once()
+            app.xibo_provider.set_display_content.assert_called_with('42', 'Test Display')
+            self.assertEqual(app.xibo_provider.set_display_content.call_count, 2)
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_monitoring_cycle_uploads_in_listing_order(self):
+        """Test that parallel downloads are still uploaded in listing order."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.seen_files = SeenFileCache()
+            app.latest_upload_ts = 1672531200  # 2023-01-01 UTC
+            app.copy_from = Mock(max_parallel_downloads=4)
+            app.display_name = 'Test Display'
+            app.nextcloud_provider = Mock()
+            app.xibo_provider = Mock()
+            
+            files = [
+                FileInfo(name=f'{i}.jpg', path=f'test-path/{i}.jpg', 
+                         upload_date=datetime(2024, 1, i + 1), size=1)
+                for i in range(3)
+            ]
+            app.nextcloud_provider.get_new_files_since.return_value = files
+            app.nextcloud_provider.open_stream.side_effect = (
+                lambda path: contextlib.nullcontext(io.BytesIO(path.encode()))
+            )
+            uploaded = []
+            app.xibo_provider.upload_media_stream.side_effect = (
+                lambda fileobj, name: uploaded.append((name, fileobj.read())) or {'mediaId': 1}
+            )
+            app.xibo_provider.set_display_content.return_value = True
+            
+            # Files are picked up once they look the same in two listings
+            self.assertEqual(app.run_monitoring_cycle().processed, 0)
+            self.assertLess(app.latest_upload_ts, files[0].upload_ts)
+            # Uploads finish in the background, in listing order
+            self.assertEqual(app.run_monitoring_cycle().processed, 0)
+            stats = app.wait_for_uploads()
+            
+            self.assertEqual(stats.succeeded, 3)
+            self.assertEqual(uploaded, [(f.name, f.path.encode()) for f in files])
+            self.assertEqual(app.latest_upload_ts, files[-1].upload_ts)
+            self.assertEqual(app.seen_files.get_cursor(), files[-1].upload_ts)
+            self.assertEqual(len(app.seen_files), 3)
+            
+        finally:
+            os.unlink(config_file)
+
+    
+    def test_single_download_worker_runs_ahead_of_uploads(self):
+        """Test that the next file downloads while the previous one uploads, and no further."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.seen_files = SeenFileCache()
+            app.display_name = 'Test Display'
+            app.nextcloud_provider = Mock()
+            app.xibo_provider = Mock()
+            app.xibo_provider.set_display_content.return_value = True
+            
+            files = [
+                FileInfo(name=f'{i}.jpg', path=f'test-path/{i}.jpg', 
+                         upload_date=datetime(2024, 1, i + 1), size=1)
+                for i in range(3)
+            ]
+            opened = []
+            second_downloaded = threading.Event()
+            def open_stream(path):
+                opened.append(path)
+                if path == files[1].path:
+                    second_downloaded.set()
+                return contextlib.nullcontext(io.BytesIO(b'data'))
+            app.nextcloud_provider.open_stream.side_effect = open_stream
+            
+            overlapped = []
+            def upload(fileobj, name):
+                if name == files[0].name:
+                    overlapped.append(second_downloaded.wait(2))
+                    overlapped.append(sorted(opened))
+                return {'mediaId': 1}
+            app.xibo_provider.upload_media_stream.side_effect = upload
+            
+            app._queue_uploads(files, max_workers=1)
+            
+            self.assertEqual(app.wait_for_uploads().succeeded, 3)
+            self.assertEqual(overlapped, [True, [files[0].path, files[1].path]])
+            self.assertCountEqual(opened, [f.path for f in files])
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_queued_files_update_display_once(self):
+        """Test that only the last of several queued files is put on the display."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.display_name = 'Test Display'
+            app.nextcloud_provider = Mock()
+            app.nextcloud_provider.open_stream.side_effect = (
+                lambda path: contextlib.nullcontext(io.BytesIO(b'data'))
+            )
+            app.xibo_provider = Mock()
+            app.xibo_provider.upload_media_stream.side_effect = [
+                {'mediaId': 1}, {'mediaId': 2}, None
+            ]
+            app.xibo_provider.set_display_content.return_value = True
+            
+            files = [
+                FileInfo(name=f'{i}.jpg', path=f'test-path/{i}.jpg', 
+                         upload_date=datetime(2024, 1, i + 1), size=1)
+                for i in range(3)
+            ]
+            for file_info in files:
+                app._upload_queue.put(file_info)
+            app._upload_queue.put(None)
+            app._upload_worker()
+            
+            results = [app._upload_results.get_nowait() for _ in files]
+            self.assertEqual([success for _, success in results], [True, True, False])
+            # The last file failed, so the one before it is shown instead
+            app.xibo_provider.set_display_content.assert_called_once_with('2', 'Test Display')
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_prefetch_retries_interrupted_download(self):
+        """Test that a download cut short by a connection error starts over."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.nextcloud_provider = Mock()
+            app._stop.wait = Mock(return_value=False)
+            
+            broken = Mock()
+            broken.read.side_effect = urllib3.exceptions.ProtocolError("Connection broken")
+            app.nextcloud_provider.open_stream.side_effect = [
+                contextlib.nullcontext(broken), contextlib.nullcontext(io.BytesIO(b'data'))
+            ]
+            file_info = FileInfo(name='image.jpg', path='test-path/image.jpg', 
+                                 upload_date=datetime(2024, 1, 1), size=4)
+            
+            fileobj = app.prefetch_file(file_info)
+            
+            self.assertEqual(fileobj.read(), b'data')
+            self.assertEqual(app.nextcloud_provider.open_stream.call_count, 2)
+            app._stop.wait.assert_called_once_with(1)
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_failed_display_update_is_not_replayed(self):
+        """Test that uploads and display updates are tried once and left for the next cycle."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.display_name = 'Test Display'
+            app.xibo_provider = Mock()
+            app.xibo_provider.upload_media_stream.return_value = {'mediaId': 42}
+            app.xibo_provider.set_display_content.return_value = False
+            app._stop.wait = Mock(return_value=False)
+            
+            file_info = FileInfo(name='image.jpg', path='test-path/image.jpg', 
+                                 upload_date=datetime(2024, 1, 1), size=4)
+            
+            self.assertFalse(app.process_file(file_info, io.BytesIO(b'data')))
+            app.xibo_provider.upload_media_stream.assert_called_once()
+            app.xibo_provider.set_display_content.assert_called_once_with('42', 'Test Display')
+            app._stop.wait.assert_not_called()
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_failed_prefetch_is_retried_next_cycle(self):
+        """Test that a file whose download failed holds the cursor and is queued again."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.seen_files = SeenFileCache()
+            app.latest_upload_ts = 1672531200  # 2023-01-01 UTC
+            app.copy_from = Mock(path='test-path', max_parallel_downloads=2)
+            app.display_name = 'Test Display'
+            app.nextcloud_provider = Mock()
+            app.xibo_provider = Mock()
+            app.xibo_provider.upload_media_stream.return_value = {'mediaId': 1}
+            app.xibo_provider.set_display_content.return_value = True
+            app._stop.set()  # Skip the retry waits
+            
+            # The activity feed reports nothing after the first cycle
+            app.nextcloud_provider.get_activity_since.return_value = (10, [])
+            files = [
+                FileInfo(name=f'{i}.jpg', path=f'test-path/{i}.jpg', 
+                         upload_date=datetime(2024, 1, i + 1), size=1)
+                for i in range(2)
+            ]
+            app.nextcloud_provider.get_new_files_since.side_effect = (
+                lambda since, *_: [f for f in files if f.upload_ts > since]
+            )
+            # The first file is streamed into its upload and the second prefetched
+            failures = [files[1].path]
+            def open_stream(path):
+                if path in failures:
+                    failures.remove(path)
+                    return None
+                return contextlib.nullcontext(io.BytesIO(b'data'))
+            app.nextcloud_provider.open_stream.side_effect = open_stream
+            
+            app.run_monitoring_cycle()
+            app.run_monitoring_cycle()
+            stats = app.wait_for_uploads()
+            self.assertEqual((stats.succeeded, stats.failed), (1, 1))
+            self.assertLess(app.latest_upload_ts, files[1].upload_ts)
+            
+            app.run_monitoring_cycle()
+            self.assertEqual(app.wait_for_uploads().succeeded, 1)
+            self.assertIn(files[1], app.seen_files)
+            self.assertEqual(app.latest_upload_ts, files[1].upload_ts)
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_monitoring_cycle_waits_for_file_to_settle(self):
+        """Test that a file still being written is only processed once it stops changing."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.seen_files = SeenFileCache()
+            app.latest_upload_ts = 1672531200  # 2023-01-01 UTC
+            app.copy_from = Mock(path='test-path', max_parallel_downloads=1)
+            app.nextcloud_provider = Mock()
+            app.nextcloud_provider.get_activity_since.return_value = None
+            app.process_file = Mock(return_value=True)
+            
+            def listing(size):
+                return [FileInfo(name='video.mp4', path='test-path/video.mp4', 
+                                 upload_date=datetime(2024, 1, 1), size=size)]
+            app.nextcloud_provider.get_new_files_since.side_effect = [
+                listing(100), listing(200), listing(200), listing(200)
+            ]
+            
+            self.assertEqual(app.run_monitoring_cycle().processed, 0)
+            self.assertEqual(app.run_monitoring_cycle().processed, 0)
+            self.assertEqual(app.run_monitoring_cycle().processed, 0)
+            self.assertEqual(app.wait_for_uploads().succeeded, 1)
+            self.assertEqual(app.run_monitoring_cycle().processed, 0)
+            app.process_file.assert_called_once()
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_failed_listing_keeps_settling_files(self):
+        """Test that a listing error is not taken for an empty directory."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.seen_files = SeenFileCache()
+            app.latest_upload_ts = 1672531200  # 2023-01-01 UTC
+            app.copy_from = Mock(path='test-path', max_parallel_downloads=1)
+            app.nextcloud_provider = Mock()
+            # The activity feed reports nothing after the first cycle
+            app.nextcloud_provider.get_activity_since.return_value = (10, [])
+            app.process_file = Mock(return_value=True)
+            
+            file_info = FileInfo(name='video.mp4', path='test-path/video.mp4', 
+                                 upload_date=datetime(2024, 1, 1), size=100)
+            app.nextcloud_provider.get_new_files_since.side_effect = [[file_info], None, [file_info]]
+            
+            app.run_monitoring_cycle()
+            app.run_monitoring_cycle()
+            self.assertIn('video.mp4', app._settling)
+            app.run_monitoring_cycle()
+            
+            self.assertEqual(app.wait_for_uploads().succeeded, 1)
+            app.process_file.assert_called_once()
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_monitoring_cycle_does_not_requeue_running_upload(self):
+        """Test that a file is not queued again while its upload is still running."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.seen_files = SeenFileCache()
+            app.latest_upload_ts = 1672531200  # 2023-01-01 UTC
+            app.copy_from = Mock(path='test-path', max_parallel_downloads=1)
+            app.nextcloud_provider = Mock()
+            app.nextcloud_provider.get_activity_since.return_value = None
+            app.nextcloud_provider.get_new_files_since.return_value = [
+                FileInfo(name='video.mp4', path='test-path/video.mp4', 
+                         upload_date=datetime(2024, 1, 1), size=100)
+            ]
+            release = threading.Event()
+            app.process_file = Mock(side_effect=lambda *_, **__: release.wait(5))
+            
+            app.run_monitoring_cycle()
+            app.run_monitoring_cycle()
+            app.run_monitoring_cycle()
+            release.set()
+            
+            self.assertEqual(app.wait_for_uploads().succeeded, 1)
+            app.process_file.assert_called_once()
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_monitoring_cycle_skips_listing_without_activity(self):
+        """Test that the listing is skipped when no activity touches the directory."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.copy_from = Mock(path='test-path')
+            app.nextcloud_provider = Mock()
+            app._last_activity_id = 10
+            app.nextcloud_provider.get_activity_since.return_value = (12, ['/other/report.pdf'])
+            
+            stats = app.run_monitoring_cycle()
+            
+            self.assertEqual(stats.processed, 0)
+            self.assertEqual(app._last_activity_id, 12)
+            app.nextcloud_provider.get_new_files_since.assert_not_called()
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_activity_anywhere_counts_for_root_path(self):
+        """Test that a monitored root folder matches activity in any path."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.nextcloud_provider = Mock()
+            app._last_activity_id = 10
+            
+            for root in ('/', ''):
+                app.copy_from = Mock(path=root)
+                app.nextcloud_provider.get_activity_since.return_value = (12, ['/slide.png'])
+                self.assertTrue(app._has_directory_activity())
+                
+                app.nextcloud_provider.get_activity_since.return_value = (12, [])
+                self.assertFalse(app._has_directory_activity())
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_run_backs_off_after_failed_cycles(self):
+        """Test that failed cycles lengthen the wait and a success resets it."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.initialize = Mock()
+            app.poll_interval = 10
+            app.run_monitoring_cycle = Mock(side_effect=[
+                RuntimeError("HTTP 503"), RuntimeError("HTTP 503"), Mock(processed=0)
+            ])
+            
+            clock = [1000.0]
+            waits = []
+            def record_wait(timeout):
+                waits.append(timeout)
+                clock[0] += timeout
+                if len(waits) == 3:
+                    app.stop()
+            app._stop.wait = record_wait
+            
+            with patch('xibo_screen_updater.core.application.time') as mock_time:
+                mock_time.monotonic.side_effect = lambda: clock[0]
+                app.run()
+            
+            self.assertEqual(waits, [20, 40, 10])
+            
+        finally:
+            os.unlink(config_file)
+    
+    def test_run_keeps_poll_grid_after_slow_cycles(self):
+        """Test that cycle time is taken off the wait and long overruns skip polls."""
+        config_file = self.create_temp_config(self.valid_config)
+        
+        try:
+            app = XiboScreenUpdater(config_file)
+            app.initialize = Mock()
+            app.poll_interval = 10
+            
+            clock = [1000.0]
+            def cycle(duration):
+                clock[0] += duration
+                return Mock(processed=0)
+            app.run_monitoring_cycle = Mock(side_effect=lambda: cycle(next(durations)))
+            durations = iter([4, 15, 50])
+            
+            waits = []
+            def record_wait(timeout):
+                waits.append(timeout)
+                clock[0] += timeout
+                if len(waits) == 3:
+                    app.stop()
+            app._stop.wait = record_wait
+            
+            with patch('xibo_screen_updater.core.application.time') as mock_time:
+                mock_time.monotonic.side_effect = lambda: clock[0]
+                app.run()
+            
+            # A 4s cycle waits 6s, a 15s cycle starts the next one straight
+            # away, and a 50s cycle falls too far behind and restarts the grid
+            self.assertEqual(waits, [6, 0, 10])
+            
+        finally:
+            os.unlink(config_file)
+
 
 if __name__ == '__main__':
     unittest.main()
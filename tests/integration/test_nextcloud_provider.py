@@ -3,15 +3,92 @@ Integration tests for NextCloud provider functionality.
 """
 
 import unittest
+import io
 import tempfile
 import os
 import yaml
-from unittest.mock import Mock, patch
+import requests
+import urllib3
+from datetime import datetime
+from unittest.mock import MagicMock, Mock, patch
 
 import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
 
-from xibo_screen_updater.providers.nextcloud import NextCloudProvider, create_nextcloud_provider
+from xibo_screen_updater.providers.nextcloud import (
+    LXML_AVAILABLE, NextCloudProvider, create_nextcloud_provider
+)
+
+
+SAMPLE_PROPFIND_RESPONSE = """<?xml version="1.0"?>
+<d:multistatus xmlns:d="DAV:" xmlns:s="http://sabredav.org/ns" xmlns:oc="http://owncloud.org/ns" xmlns:nc="http://nextcloud.org/ns">
+    <d:response>
+        <d:href>/remote.php/dav/files/testuser/test-path/</d:href>
+        <d:propstat>
+            <d:prop>
+                <d:getlastmodified>Mon, 01 Jan 2024 10:00:00 GMT</d:getlastmodified>
+                <d:resourcetype><d:collection/></d:resourcetype>
+                <d:getetag>&quot;dir-etag&quot;</d:getetag>
+            </d:prop>
+            <d:status>HTTP/1.1 200 OK</d:status>
+        </d:propstat>
+    </d:response>
+    <d:response>
+        <d:href>/remote.php/dav/files/testuser/test-path/photo.JPG</d:href>
+        <d:propstat>
+            <d:prop>
+                <d:getlastmodified>Mon, 01 Jan 2024 11:00:00 GMT</d:getlastmodified>
+                <d:getcontentlength>1024</d:getcontentlength>
+                <d:resourcetype/>
+                <d:getetag>&quot;abc123&quot;</d:getetag>
+                <d:getcontenttype>image/jpeg</d:getcontenttype>
+                <nc:upload_time>1704110400</nc:upload_time>
+            </d:prop>
+            <d:status>HTTP/1.1 200 OK</d:status>
+        </d:propstat>
+    </d:response>
+    <d:response>
+        <d:href>/remote.php/dav/files/testuser/test-path/slide%20one.png</d:href>
+        <d:propstat>
+            <d:prop>
+                <d:getlastmodified>Tue, 02 Jan 2024 08:30:00 GMT</d:getlastmodified>
+                <d:getcontentlength>2048</d:getcontentlength>
+                <d:resourcetype/>
+                <d:getetag>&quot;def456&quot;</d:getetag>
+                <d:getcontenttype>image/png</d:getcontenttype>
+            </d:prop>
+            <d:status>HTTP/1.1 200 OK</d:status>
+        </d:propstat>
+    </d:response>
+    <d:response>
+        <d:href>/remote.php/dav/files/testuser/test-path/notes.txt</d:href>
+        <d:propstat>
+            <d:prop>
+                <d:getlastmodified>Tue, 02 Jan 2024 09:00:00 GMT</d:getlastmodified>
+                <d:getcontentlength>12</d:getcontentlength>
+                <d:resourcetype/>
+                <d:getetag>&quot;ghi789&quot;</d:getetag>
+                <d:getcontenttype>text/plain</d:getcontenttype>
+            </d:prop>
+            <d:status>HTTP/1.1 200 OK</d:status>
+        </d:propstat>
+    </d:response>
+</d:multistatus>
+"""
+
+SAMPLE_ETAG_RESPONSE = """<?xml version="1.0"?>
+<d:multistatus xmlns:d="DAV:">
+    <d:response>
+        <d:href>/remote.php/dav/files/testuser/test-path/</d:href>
+        <d:propstat>
+            <d:prop>
+                <d:getetag>&quot;dir-etag&quot;</d:getetag>
+            </d:prop>
+            <d:status>HTTP/1.1 200 OK</d:status>
+        </d:propstat>
+    </d:response>
+</d:multistatus>
+"""
 
 
 class TestNextCloudProviderIntegration(unittest.TestCase):
@@ -76,7 +153,7 @@ class TestNextCloudProviderIntegration(unittest.TestCase):
         
         self.assertIn('Missing required NextCloud configuration', str(cm.exception))
     
-    @patch('xibo_screen_updater.providers.nextcloud.requests.request')
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
     def test_connection_success(self, mock_request):
         """Test successful connection to NextCloud."""
         # Mock successful WebDAV response
@@ -90,7 +167,17 @@ class TestNextCloudProviderIntegration(unittest.TestCase):
         self.assertTrue(result)
         mock_request.assert_called_once()
     
-    @patch('xibo_screen_updater.providers.nextcloud.requests.request')
+    def test_session_retries_idempotent_requests(self):
+        """Test that the pooled session retries reads but not uploads."""
+        provider = create_nextcloud_provider(self.valid_config)
+        retries = provider.session.get_adapter(provider.server_url).max_retries
+        
+        self.assertEqual(retries.total, 3)
+        self.assertIn(503, retries.status_forcelist)
+        self.assertIn('PROPFIND', retries.allowed_methods)
+        self.assertNotIn('PUT', retries.allowed_methods)
+    
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
     def test_connection_failure(self, mock_request):
         """Test failed connection to NextCloud."""
         # Mock failed response
@@ -103,7 +190,7 @@ class TestNextCloudProviderIntegration(unittest.TestCase):
         
         self.assertFalse(result)
     
-    @patch('xibo_screen_updater.providers.nextcloud.requests.request')
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
     def test_connection_network_error(self, mock_request):
         """Test network error during connection."""
         # Mock network error
@@ -114,6 +201,273 @@ class TestNextCloudProviderIntegration(unittest.TestCase):
         
         self.assertFalse(result)
 
+    
+    def test_parse_propfind_filters_extensions(self):
+        """Test parsing a PROPFIND response with case-insensitive extension filtering."""
+        provider = create_nextcloud_provider(self.valid_config)
+        
+        collection_etag, files = provider._parse_propfind_response(
+            SAMPLE_PROPFIND_RESPONSE, ['.JPG', '.png']
+        )
+        
+        self.assertEqual(collection_etag, 'dir-etag')
+        self.assertEqual([f.name for f in files], ['photo.JPG', 'slide one.png'])
+        photo, slide = files
+        self.assertEqual(photo.path, 'test-path/photo.JPG')
+        self.assertEqual(photo.size, 1024)
+        self.assertEqual(photo.etag, 'abc123')
+        self.assertEqual(photo.content_type, 'image/jpeg')
+        self.assertEqual(photo.upload_date, datetime(2024, 1, 1, 12, 0, 0))
+        self.assertEqual(slide.upload_date, datetime(2024, 1, 2, 8, 30, 0))
+        self.assertEqual(slide.upload_ts, 1704184200)
+    
+    def test_parse_propfind_honours_date_offset(self):
+        """Test that a last modified date with a numeric zone is converted to UTC."""
+        provider = create_nextcloud_provider(self.valid_config)
+        xml = SAMPLE_PROPFIND_RESPONSE.replace(
+            'Tue, 02 Jan 2024 08:30:00 GMT', 'Tue, 02 Jan 2024 09:30:00 +0100'
+        )
+        
+        _, files = provider._parse_propfind_response(xml, ['.png'])
+        
+        self.assertEqual(files[0].upload_ts, 1704184200)
+
+    @unittest.skipUnless(LXML_AVAILABLE, "lxml not installed")
+    def test_parse_propfind_with_lxml_leaves_entities_unresolved(self):
+        """Test the lxml parser with blank text and an internal entity declaration."""
+        provider = create_nextcloud_provider(self.valid_config)
+        xml = SAMPLE_PROPFIND_RESPONSE.replace(
+            '<?xml version="1.0"?>',
+            '<?xml version="1.0"?>\n<!DOCTYPE d:multistatus [<!ENTITY mime "image/png">]>'
+        ).replace(
+            '<d:getcontenttype>image/png</d:getcontenttype>',
+            '<d:getcontenttype>&mime;</d:getcontenttype>'
+        )
+        
+        collection_etag, files = provider._parse_propfind_response(xml, ['.jpg', '.png'])
+        
+        self.assertEqual(collection_etag, 'dir-etag')
+        self.assertEqual([f.name for f in files], ['photo.JPG', 'slide one.png'])
+        self.assertEqual(files[0].content_type, 'image/jpeg')
+        self.assertNotEqual(files[1].content_type, 'image/png')
+        self.assertEqual(files[1].size, 2048)
+
+    
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
+    def test_failed_listing_is_told_apart_from_empty_directory(self, mock_request):
+        """Test that new files are None after a listing error and empty for an empty listing."""
+        provider = create_nextcloud_provider(self.valid_config)
+        provider._connected = True
+        
+        mock_request.side_effect = requests.ConnectionError("Connection refused")
+        self.assertIsNone(provider.get_new_files_since(0, 'test-path', ['.jpg']))
+        self.assertEqual(provider.get_files('test-path', ['.jpg']), [])
+        
+        mock_request.side_effect = [Mock(status_code=207, raw=io.BytesIO(b'<d:multistatus'))]
+        self.assertIsNone(provider.get_new_files_since(0, 'test-path', ['.jpg']))
+        
+        mock_request.side_effect = [Mock(status_code=207, raw=io.BytesIO(SAMPLE_PROPFIND_RESPONSE.encode()))]
+        self.assertEqual(provider.get_new_files_since(1893456000, 'test-path', ['.jpg']), [])
+    
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
+    def test_get_files_reuses_listing_when_unchanged(self, mock_request):
+        """Test that an unchanged collection etag skips re-parsing the listing."""
+        listing = Mock(status_code=207, raw=io.BytesIO(SAMPLE_PROPFIND_RESPONSE.encode()))
+        unchanged = Mock(status_code=412)
+        mock_request.side_effect = [listing, unchanged]
+        
+        provider = create_nextcloud_provider(self.valid_config)
+        provider._connected = True
+        
+        first = provider.get_files('test-path', ['.jpg'])
+        with patch.object(provider, '_parse_propfind_response') as mock_parse:
+            second = provider.get_files('test-path', ['.jpg'])
+            mock_parse.assert_not_called()
+        
+        self.assertEqual(first, second)
+        self.assertNotIn('If-None-Match', mock_request.call_args_list[0].kwargs['headers'])
+        self.assertEqual(mock_request.call_args_list[1].kwargs['headers']['If-None-Match'], '"dir-etag"')
+        self.assertEqual(mock_request.call_args_list[1].kwargs['headers']['Depth'], '0')
+    
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
+    def test_get_files_compares_etag_when_server_ignores_precondition(self, mock_request):
+        """Test that a Depth 0 answer with the same etag also reuses the listing."""
+        listing = Mock(status_code=207, raw=io.BytesIO(SAMPLE_PROPFIND_RESPONSE.encode()))
+        probe = Mock(status_code=207, text=SAMPLE_ETAG_RESPONSE)
+        mock_request.side_effect = [listing, probe]
+        
+        provider = create_nextcloud_provider(self.valid_config)
+        provider._connected = True
+        
+        first = provider.get_files('test-path', ['.jpg'])
+        second = provider.get_files('test-path', ['.jpg'])
+        
+        self.assertEqual(first, second)
+        self.assertEqual(mock_request.call_count, 2)
+    
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
+    def test_iter_files_streams_listing(self, mock_request):
+        """Test that files are yielded from the streamed PROPFIND body."""
+        mock_request.return_value = Mock(
+            status_code=207, raw=io.BytesIO(SAMPLE_PROPFIND_RESPONSE.encode())
+        )
+        
+        provider = create_nextcloud_provider(self.valid_config)
+        provider._connected = True
+        
+        files = provider.iter_files('test-path', ['.png'])
+        
+        self.assertEqual([f.name for f in files], ['slide one.png'])
+        self.assertTrue(mock_request.call_args.kwargs['stream'])
+        mock_request.return_value.close.assert_called_once()
+    
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
+    def test_get_activity_since(self, mock_request):
+        """Test reading changed paths from the Activity app feed."""
+        changes = Mock(status_code=200)
+        changes.json.return_value = {'ocs': {'data': [
+            {'activity_id': 11, 'objects': {'7': '/test-path/photo.jpg'}},
+            {'activity_id': 12, 'object_name': '/other/report.pdf'},
+        ]}}
+        mock_request.side_effect = [changes, Mock(status_code=304), Mock(status_code=404)]
+        
+        provider = create_nextcloud_provider(self.valid_config)
+        
+        self.assertEqual(
+            provider.get_activity_since(10), (12, ['/test-path/photo.jpg', '/other/report.pdf'])
+        )
+        self.assertEqual(provider.get_activity_since(12), (12, []))
+        self.assertIsNone(provider.get_activity_since(12))
+        self.assertFalse(provider.activity_feed_available)
+        
+        # No further requests once the feed is known to be missing
+        self.assertIsNone(provider.get_activity_since(12))
+        self.assertEqual(mock_request.call_count, 3)
+    
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
+    def test_download_file_streams_to_disk(self, mock_request):
+        """Test that downloads are copied from the raw response stream."""
+        # An advertised length above the decoded size must not leave padding behind
+        response = MagicMock(status_code=200, raw=io.BytesIO(b'image-bytes'), 
+                             headers={'Content-Length': '64'})
+        response.__enter__.return_value = response
+        mock_request.return_value = response
+        
+        provider = create_nextcloud_provider(self.valid_config)
+        provider._connected = True
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            local_path = os.path.join(tmp_dir, 'image.jpg')
+            result = provider.download_file('test-path/image.jpg', local_path)
+            
+            self.assertEqual(result, local_path)
+            with open(local_path, 'rb') as f:
+                self.assertEqual(f.read(), b'image-bytes')
+        self.assertTrue(mock_request.call_args.kwargs['stream'])
+    
+    @patch('xibo_screen_updater.providers.nextcloud.time.sleep')
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
+    def test_download_file_retries_interrupted_body(self, mock_request, mock_sleep):
+        """Test that a download cut off mid-body is retried after a backoff."""
+        broken_raw = Mock()
+        broken_raw.read.side_effect = urllib3.exceptions.ProtocolError('Connection broken')
+        broken = MagicMock(status_code=200, raw=broken_raw, headers={})
+        broken.__enter__.return_value = broken
+        complete = MagicMock(status_code=200, raw=io.BytesIO(b'image-bytes'), headers={})
+        complete.__enter__.return_value = complete
+        mock_request.side_effect = [broken, complete]
+        
+        provider = create_nextcloud_provider(self.valid_config)
+        provider._connected = True
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            local_path = os.path.join(tmp_dir, 'image.jpg')
+            result = provider.download_file('test-path/image.jpg', local_path)
+            
+            self.assertEqual(result, local_path)
+            with open(local_path, 'rb') as f:
+                self.assertEqual(f.read(), b'image-bytes')
+        mock_sleep.assert_called_once()
+    
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
+    def test_download_file_keeps_unchanged_local_copy(self, mock_request):
+        """Test that a repeated download sends the ETag and keeps the file on 304."""
+        first = MagicMock(status_code=200, raw=io.BytesIO(b'image-bytes'), headers={'ETag': '"abc"'})
+        first.__enter__.return_value = first
+        second = MagicMock(status_code=304, headers={})
+        second.__enter__.return_value = second
+        mock_request.side_effect = [first, second]
+        
+        provider = create_nextcloud_provider(self.valid_config)
+        provider._connected = True
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            local_path = os.path.join(tmp_dir, 'image.jpg')
+            provider.download_file('test-path/image.jpg', local_path)
+            result = provider.download_file('test-path/image.jpg', local_path)
+            
+            self.assertEqual(result, local_path)
+            with open(local_path, 'rb') as f:
+                self.assertEqual(f.read(), b'image-bytes')
+        self.assertEqual(mock_request.call_args.kwargs['headers'], {'If-None-Match': '"abc"'})
+    
+    def test_download_files_reports_partial_failures(self):
+        """Test that one failed download does not abort the batch."""
+        provider = create_nextcloud_provider(self.valid_config)
+        provider._connected = True
+        provider.download_file = Mock(side_effect=lambda path, local: None if 'missing' in path else local)
+        
+        downloaded, failed = provider.download_files({
+            'test-path/a.jpg': '/tmp/a.jpg',
+            'test-path/missing.jpg': '/tmp/missing.jpg',
+            'test-path/b.jpg': '/tmp/b.jpg',
+        })
+        
+        self.assertEqual(sorted(downloaded), ['/tmp/a.jpg', '/tmp/b.jpg'])
+        self.assertEqual(failed, ['test-path/missing.jpg'])
+    
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
+    def test_download_file_reports_broken_body_as_network_error(self, mock_request):
+        """Test that a ChunkedEncodingError mid-download is not treated as a local error."""
+        raw = Mock()
+        raw.read.side_effect = requests.exceptions.ChunkedEncodingError("invalid chunk length")
+        response = MagicMock(status_code=200, raw=raw, headers={})
+        response.__enter__.return_value = response
+        mock_request.return_value = response
+        
+        provider = create_nextcloud_provider(self.valid_config)
+        provider._connected = True
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.assertLogs('xibo_screen_updater.providers.nextcloud', 'ERROR') as logs:
+                result = provider.download_file('test-path/video.mp4', os.path.join(tmp_dir, 'video.mp4'))
+            
+            self.assertIsNone(result)
+            self.assertIn('Network error downloading test-path/video.mp4', logs.output[0])
+            self.assertIn(tmp_dir, provider._local_dirs)
+    
+    @patch('xibo_screen_updater.providers.nextcloud.requests.Session.request')
+    def test_download_files_creates_directory_once(self, mock_request):
+        """Test that a batch into one directory creates it once, not per file."""
+        def respond(method, url, **kwargs):
+            response = MagicMock(status_code=200, raw=io.BytesIO(b'data'), headers={})
+            response.__enter__.return_value = response
+            return response
+        mock_request.side_effect = respond
+        
+        provider = create_nextcloud_provider(self.valid_config)
+        provider._connected = True
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            target = os.path.join(tmp_dir, 'media')
+            files = {f'test-path/{i}.jpg': os.path.join(target, f'{i}.jpg') for i in range(3)}
+            with patch('xibo_screen_updater.providers.nextcloud.os.makedirs', wraps=os.makedirs) as makedirs:
+                downloaded, failed = provider.download_files(files)
+            
+            self.assertEqual(sorted(downloaded), sorted(files.values()))
+            self.assertEqual(failed, [])
+            makedirs.assert_called_once_with(target, exist_ok=True)
+
 
 class TestNextCloudProviderLiveIntegration(unittest.TestCase):
     """Live integration tests (require actual config file)."""
@@ -3,6 +3,7 @@ Integration tests for Xibo provider functionality.
 """
 
 import unittest
+import io
 import tempfile
 import os
 import yaml
@@ -72,7 +73,7 @@ class TestXiboProviderIntegration(unittest.TestCase):
         
         self.assertIn('Missing required Xibo configuration', str(cm.exception))
     
-    @patch('xibo_screen_updater.providers.xibo.requests.post')
+    @patch('xibo_screen_updater.providers.xibo.requests.Session.post')
     def test_authentication_success(self, mock_post):
         """Test successful authentication with Xibo."""
         # Mock successful OAuth2 response
@@ -91,7 +92,7 @@ class TestXiboProviderIntegration(unittest.TestCase):
         self.assertEqual(provider.access_token, 'test_token')
         mock_post.assert_called_once()
     
-    @patch('xibo_screen_updater.providers.xibo.requests.post')
+    @patch('xibo_screen_updater.providers.xibo.requests.Session.post')
     def test_authentication_failure(self, mock_post):
         """Test failed authentication with Xibo."""
         # Mock failed response
@@ -105,7 +106,7 @@ class TestXiboProviderIntegration(unittest.TestCase):
         
         self.assertFalse(result)
     
-    @patch('xibo_screen_updater.providers.xibo.requests.post')
+    @patch('xibo_screen_updater.providers.xibo.requests.Session.post')
     def test_authentication_network_error(self, mock_post):
         """Test network error during authentication."""
         # Mock network error
@@ -116,8 +117,8 @@ class TestXiboProviderIntegration(unittest.TestCase):
         
         self.assertFalse(result)
     
-    @patch('xibo_screen_updater.providers.xibo.requests.request')
-    @patch('xibo_screen_updater.providers.xibo.requests.post')
+    @patch('xibo_screen_updater.providers.xibo.requests.Session.request')
+    @patch('xibo_screen_updater.providers.xibo.requests.Session.post')
     def test_get_displays(self, mock_post, mock_request):
         """Test getting displays from Xibo."""
         # Mock authentication
@@ -144,6 +145,82 @@ class TestXiboProviderIntegration(unittest.TestCase):
         
         self.assertEqual(len(displays), 2)
         self.assertEqual(displays[0]['display'], 'Test Display 1')
+    
+    @patch('xibo_screen_updater.providers.xibo.requests.Session.request')
+    @patch('xibo_screen_updater.providers.xibo.requests.Session.post')
+    def test_upload_media_stream_sends_sized_multipart_body(self, mock_post, mock_request):
+        """Test that uploads stream a multipart body with a known length."""
+        mock_post.return_value = Mock(status_code=200)
+        mock_post.return_value.json.return_value = {'access_token': 'test_token', 'expires_in': 3600}
+        sent = {}
+        def record(method, url, **kwargs):
+            sent['body'] = b''.join(kwargs['data'])
+            sent['length'] = kwargs['data'].len
+            sent['content_type'] = kwargs['headers']['Content-Type']
+            response = Mock(status_code=200, headers={})
+            response.json.return_value = {'files': [{'mediaId': 7}]}
+            return response
+        mock_request.side_effect = record
+        
+        # A stream without seek support is spooled to learn its length
+        stream = io.BufferedReader(io.BytesIO(b'image-bytes'))
+        stream.seekable = lambda: False
+        
+        provider = create_xibo_provider(self.valid_config)
+        media_info = provider.upload_media_stream(stream, 'photo.jpg')
+        
+        self.assertEqual(media_info, {'mediaId': 7})
+        self.assertEqual(len(sent['body']), sent['length'])
+        self.assertTrue(sent['content_type'].startswith('multipart/form-data; boundary='))
+        self.assertIn(b'filename="photo.jpg"', sent['body'])
+        self.assertIn(b'\r\n\r\nimage-bytes\r\n', sent['body'])
+    
+    @patch('xibo_screen_updater.providers.xibo.requests.Session.request')
+    @patch('xibo_screen_updater.providers.xibo.requests.Session.post')
+    def test_rejected_token_is_refreshed_once(self, mock_post, mock_request):
+        """Test that a 401 re-authenticates and retries the request once."""
+        mock_post.return_value = Mock(status_code=200)
+        mock_post.return_value.json.return_value = {'access_token': 'new_token', 'expires_in': 3600}
+        
+        rejected = Mock(status_code=401)
+        accepted = Mock(status_code=200, headers={})
+        accepted.json.return_value = []
+        mock_request.side_effect = [rejected, accepted]
+        
+        provider = create_xibo_provider(self.valid_config)
+        provider.access_token = 'revoked_token'
+        provider.token_expires_at = float('inf')
+        
+        self.assertEqual(provider.get_displays(), [])
+        mock_post.assert_called_once()
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual(
+            mock_request.call_args.kwargs['headers']['Authorization'], 'Bearer new_token'
+        )
+    
+    @patch('xibo_screen_updater.providers.xibo.requests.Session.request')
+    @patch('xibo_screen_updater.providers.xibo.requests.Session.post')
+    def test_token_revoked_right_after_login_is_refreshed(self, mock_post, mock_request):
+        """Test that a recent login does not stop a 401 from re-authenticating."""
+        mock_post.return_value = Mock(status_code=200)
+        mock_post.return_value.json.return_value = {'access_token': 'token', 'expires_in': 3600}
+        
+        rejected = Mock(status_code=401)
+        accepted = Mock(status_code=200, headers={})
+        accepted.json.return_value = []
+        mock_request.side_effect = [rejected, accepted, rejected, rejected]
+        
+        provider = create_xibo_provider(self.valid_config)
+        self.assertTrue(provider.authenticate())
+        
+        self.assertEqual(provider.get_displays(), [])
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(mock_request.call_count, 2)
+        
+        # A second 401 within REAUTH_INTERVAL is not retried
+        provider.get_displays()
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual(mock_request.call_count, 3)
 
 
 class TestXiboProviderLiveIntegration(unittest.TestCase):
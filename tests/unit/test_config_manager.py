@@ -95,6 +95,7 @@ class TestConfigManager(unittest.TestCase):
             with self.assertRaises(ConfigurationError) as cm:
                 self.config_manager.load_config(config_file)
             self.assertIn('Missing required field in copy_from', str(cm.exception))
+            self.assertIn('auth, extensions, path, provider, server', str(cm.exception))
         finally:
             os.unlink(config_file)
     
@@ -110,6 +111,19 @@ class TestConfigManager(unittest.TestCase):
         finally:
             os.unlink(config_file)
     
+    def test_missing_display_name(self):
+        """Test config missing project_to.display.name."""
+        invalid_config = self.valid_config.copy()
+        invalid_config['project_to'] = dict(self.valid_config['project_to'], display={})
+        config_file = self.create_temp_config(invalid_config)
+        
+        try:
+            with self.assertRaises(ConfigurationError) as cm:
+                self.config_manager.load_config(config_file)
+            self.assertIn('Missing required field in project_to.display: name', str(cm.exception))
+        finally:
+            os.unlink(config_file)
+    
     def test_get_display_name(self):
         """Test getting display name."""
         config_file = self.create_temp_config(self.valid_config)
@@ -144,6 +158,89 @@ class TestConfigManager(unittest.TestCase):
             self.assertEqual(poll_interval, 10)  # Default value
         finally:
             os.unlink(config_file)
+    
+    def test_parsed_sections(self):
+        """Test that sections are exposed as read-only typed objects."""
+        config = dict(self.valid_config)
+        config['project_to'] = dict(self.valid_config['project_to'], criteria=[])
+        config_file = self.create_temp_config(config)
+        
+        try:
+            self.config_manager.load_config(config_file)
+            copy_from = self.config_manager.copy_from
+            self.assertEqual(copy_from.user, 'testuser')
+            self.assertEqual(copy_from.extensions, ('.jpg', '.png'))
+            self.assertEqual(self.config_manager.project_to.display_name, 'Test Display')
+            
+            with self.assertRaises(AttributeError):
+                copy_from.user = 'other'
+        finally:
+            os.unlink(config_file)
+    
+    def test_extensions_are_normalized(self):
+        """Test that extensions are lowercased and given a leading dot."""
+        config = dict(self.valid_config)
+        config['copy_from'] = dict(self.valid_config['copy_from'], extensions=['JPG', '.Png'])
+        config['project_to'] = dict(self.valid_config['project_to'], criteria=[])
+        config_file = self.create_temp_config(config)
+        
+        try:
+            self.config_manager.load_config(config_file)
+            self.assertEqual(self.config_manager.get_extensions(), ('.jpg', '.png'))
+        finally:
+            os.unlink(config_file)
+
+
+class TestConfigCache(unittest.TestCase):
+    """Test caching of parsed configuration files."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.config_data = {
+            'copy_from': {
+                'provider': 'nextcloud',
+                'server': 'http://localhost:8080',
+                'path': 'test-path',
+                'auth': {'user': 'testuser', 'password': 'testpass'},
+                'extensions': ['.jpg']
+            },
+            'project_to': {
+                'provider': 'xibo',
+                'host': 'http://localhost:8082/api/',
+                'auth': {'client_id': 'test_client', 'client_secret': 'test_secret'},
+                'display': {'name': 'Test Display'},
+                'criteria': []
+            }
+        }
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False) as f:
+            yaml.dump(self.config_data, f)
+            self.config_file = f.name
+    
+    def tearDown(self):
+        os.unlink(self.config_file)
+    
+    def test_unchanged_file_is_not_reparsed(self):
+        """Test that loading an unchanged file reuses the cached result."""
+        first = ConfigManager().load_config(self.config_file)
+        
+        with patch('xibo_screen_updater.core.config_manager.yaml.load') as mock_load:
+            second = ConfigManager().load_config(self.config_file)
+            mock_load.assert_not_called()
+        
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second)
+    
+    def test_modified_file_is_reparsed(self):
+        """Test that a changed file invalidates the cache."""
+        ConfigManager().load_config(self.config_file)
+        
+        self.config_data['copy_from']['poll_interval'] = 42
+        with open(self.config_file, 'w') as f:
+            yaml.dump(self.config_data, f)
+        
+        manager = ConfigManager()
+        manager.load_config(self.config_file)
+        self.assertEqual(manager.get_poll_interval(), 42)
 
 
 class TestConfigPathResolution(unittest.TestCase):
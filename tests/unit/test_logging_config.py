@@ -0,0 +1,106 @@
+"""
+Unit tests for logging configuration.
+"""
+
+import unittest
+import logging
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from xibo_screen_updater.core.logging_config import ColoredFormatter, setup_logging, stop_logging
+
+
+class TestColoredFormatter(unittest.TestCase):
+    """Test the colored console formatter."""
+    
+    def make_record(self, level=logging.INFO, msg='Processing %s', args=('image.jpg',)):
+        """Build a log record for tests."""
+        return logging.LogRecord('xibo_screen_updater', level, __file__, 1, msg, args, None)
+    
+    def test_colors_level_name(self):
+        """Test that the level name is wrapped in its ANSI color."""
+        formatter = ColoredFormatter('[%(levelname_colored)s] %(message)s')
+        
+        output = formatter.format(self.make_record())
+        
+        self.assertEqual(output, '[\033[32mINFO\033[0m] Processing image.jpg')
+    
+    def test_does_not_mutate_record(self):
+        """Test that other handlers still see the plain level name."""
+        formatter = ColoredFormatter('[%(levelname_colored)s] %(message)s')
+        plain = logging.Formatter('[%(levelname)s] %(message)s')
+        record = self.make_record(level=logging.ERROR)
+        
+        formatter.format(record)
+        
+        self.assertEqual(record.levelname, 'ERROR')
+        self.assertEqual(plain.format(record), '[ERROR] Processing image.jpg')
+
+    
+    def test_console_fast_path_matches_standard_formatting(self):
+        """Test that the console fast path renders like Formatter.format."""
+        fast = ColoredFormatter(ColoredFormatter.CONSOLE_FORMAT, datefmt='%Y-%m-%d %H:%M:%S')
+        record = self.make_record()
+        record.levelname_colored = '\033[32mINFO\033[0m'
+        
+        expected = logging.Formatter.format(fast, record)
+        
+        self.assertTrue(fast._fast_path)
+        self.assertEqual(fast.format(record), expected)
+
+    
+    def test_format_time_is_reused_within_a_second(self):
+        """Test that the formatted timestamp is cached per second."""
+        formatter = ColoredFormatter(ColoredFormatter.CONSOLE_FORMAT, datefmt='%Y-%m-%d %H:%M:%S')
+        first, second, later = self.make_record(), self.make_record(), self.make_record()
+        first.created, second.created, later.created = 1700000000.1, 1700000000.9, 1700000001.0
+        
+        expected = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(1700000000))
+        self.assertEqual(formatter.formatTime(first, formatter.datefmt), expected)
+        with patch('xibo_screen_updater.core.logging_config.time.strftime') as mock_strftime:
+            self.assertEqual(formatter.formatTime(second, formatter.datefmt), expected)
+            mock_strftime.assert_not_called()
+        self.assertNotEqual(formatter.formatTime(later, formatter.datefmt), expected)
+
+
+
+class TestSetupLogging(unittest.TestCase):
+    """Test logger setup."""
+    
+    def test_file_logging_is_buffered_until_error(self):
+        """Test that INFO records are buffered and flushed by an ERROR."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            log_file = os.path.join(tmp_dir, 'app.log')
+            logger = setup_logging(log_file=log_file)
+            
+            try:
+                logger.info("Processing %s", 'image.jpg')
+                self.assertFalse(os.path.exists(log_file))
+                
+                logger.error("Upload failed")
+                stop_logging()  # Wait for the background writer
+                with open(log_file) as f:
+                    lines = f.read().splitlines()
+                self.assertEqual(len(lines), 2)
+                self.assertTrue(lines[0].endswith('[INFO] xibo_screen_updater: Processing image.jpg'))
+                self.assertNotIn('\033', lines[1])
+            finally:
+                setup_logging()
+    
+    def test_level_names_are_case_insensitive(self):
+        """Test that level names resolve regardless of case, defaulting to INFO."""
+        try:
+            self.assertEqual(setup_logging('debug').level, logging.DEBUG)
+            self.assertEqual(setup_logging('WARNING').level, logging.WARNING)
+            self.assertEqual(setup_logging('verbose').level, logging.INFO)
+        finally:
+            setup_logging()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Unit tests for the retry helper.
+"""
+
+import unittest
+from unittest.mock import Mock
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+import requests
+
+from xibo_screen_updater.core.retry import with_retries
+
+
+class TestWithRetries(unittest.TestCase):
+    """Test retrying failed calls with exponential backoff."""
+    
+    def test_retries_transient_errors_with_backoff(self):
+        """Test that connection errors and timeouts are retried after growing delays."""
+        fn = Mock(side_effect=[requests.ConnectionError("reset"), requests.Timeout(), {'mediaId': 1}])
+        wait = Mock(return_value=None)
+        
+        self.assertEqual(with_retries(fn, wait=wait), {'mediaId': 1})
+        self.assertEqual(fn.call_count, 3)
+        self.assertEqual([c.args[0] for c in wait.call_args_list], [1, 2])
+    
+    def test_falsy_results_are_not_retried(self):
+        """Test that a failure reported through the result is returned straight away."""
+        fn = Mock(return_value=False)
+        wait = Mock(return_value=None)
+        
+        self.assertFalse(with_retries(fn, wait=wait))
+        self.assertEqual(fn.call_count, 1)
+        wait.assert_not_called()
+    
+    def test_only_server_errors_are_retried(self):
+        """Test that HTTP 5xx responses are retried and 4xx responses are not."""
+        def http_error(status_code):
+            return requests.HTTPError(response=Mock(status_code=status_code))
+        
+        fn = Mock(side_effect=[http_error(503), 'ok'])
+        self.assertEqual(with_retries(fn, wait=Mock(return_value=None)), 'ok')
+        
+        fn = Mock(side_effect=http_error(404))
+        with self.assertRaises(requests.HTTPError):
+            with_retries(fn, wait=Mock(return_value=None))
+        self.assertEqual(fn.call_count, 1)
+    
+    def test_reraises_transient_error_on_last_attempt(self):
+        """Test that network errors are retried and the last one is raised."""
+        fn = Mock(side_effect=requests.ConnectionError("reset"))
+        
+        with self.assertRaises(requests.ConnectionError):
+            with_retries(fn, wait=Mock(return_value=None))
+        self.assertEqual(fn.call_count, 3)
+    
+    def test_stops_when_wait_is_interrupted(self):
+        """Test that a wait returning True, as a set Event does, ends the retries."""
+        fn = Mock(side_effect=requests.Timeout())
+        
+        with self.assertRaises(requests.Timeout):
+            with_retries(fn, wait=Mock(return_value=True))
+        self.assertEqual(fn.call_count, 1)
+    
+    def test_other_errors_are_not_retried(self):
+        """Test that programming errors propagate immediately."""
+        fn = Mock(side_effect=KeyError('mediaId'))
+        
+        with self.assertRaises(KeyError):
+            with_retries(fn, wait=Mock(return_value=None))
+        self.assertEqual(fn.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
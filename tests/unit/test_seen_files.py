@@ -0,0 +1,84 @@
+"""
+Unit tests for seen-file tracking.
+"""
+
+import unittest
+import tempfile
+import os
+from datetime import datetime
+
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'src'))
+
+from xibo_screen_updater.core.seen_files import SeenFileCache
+from xibo_screen_updater.types.file_info import FileInfo
+
+
+class TestSeenFileCache(unittest.TestCase):
+    """Test the persistent seen-file cache."""
+    
+    def make_file(self, name='image.jpg', size=100, upload_date=datetime(2024, 1, 1, 12, 0), etag=None):
+        """Build a FileInfo for tests."""
+        return FileInfo(name=name, path=f"test-path/{name}", upload_date=upload_date, size=size, etag=etag)
+    
+    def test_add_and_contains(self):
+        """Test that added files are reported as seen."""
+        cache = SeenFileCache()
+        file_info = self.make_file()
+        
+        self.assertNotIn(file_info, cache)
+        cache.add(file_info)
+        self.assertIn(file_info, cache)
+    
+    def test_modified_file_is_not_seen(self):
+        """Test that a file with the same name but new size is treated as new."""
+        cache = SeenFileCache()
+        cache.add(self.make_file(size=100))
+        
+        self.assertNotIn(self.make_file(size=200), cache)
+    
+    def test_new_etag_replaces_entry(self):
+        """Test that processing a new version replaces the old one."""
+        cache = SeenFileCache()
+        old = self.make_file(etag='v1')
+        new = self.make_file(etag='v2')
+        
+        cache.add(old)
+        self.assertNotIn(new, cache)
+        cache.add(new)
+        
+        self.assertEqual(len(cache), 1)
+        self.assertIn(new, cache)
+        self.assertNotIn(old, cache)
+    
+    def test_persistence(self):
+        """Test that entries survive closing and reopening the database."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'cache', 'seen.db')
+            file_info = self.make_file(etag='abc123')
+            
+            cache = SeenFileCache(path=path)
+            cache.add(file_info)
+            cache.close()
+            
+            restored = SeenFileCache(path=path)
+            restored.load()
+            self.assertIn(file_info, restored)
+            restored.close()
+    
+    def test_cursor_persistence(self):
+        """Test that the monitoring cursor survives closing and reopening the database."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'seen.db')
+            
+            cache = SeenFileCache(path=path)
+            self.assertIsNone(cache.get_cursor())
+            cache.set_cursor(1704110400)
+            cache.close()
+            
+            restored = SeenFileCache(path=path)
+            self.assertEqual(restored.get_cursor(), 1704110400)
+            restored.close()
+
+if __name__ == '__main__':
+    unittest.main()